@@ -0,0 +1,249 @@
+import os
+import threading
+import time
+
+
+class SyntheticSource:
+    """
+    合成画面源，接口与 cv2.VideoCapture 相同 (read / isOpened / set / get / release)，
+    用于在没有摄像头的环境下测试采集与重连逻辑
+    """
+
+    def __init__(self, width=320, height=240, fps=30.0, fail_after=None, fail_count=0):
+        """
+        :param fail_after: 读取到第几帧后开始失败 (模拟拔出摄像头)，None 表示不失败
+        :param fail_count: 连续失败的次数，之后恢复正常
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fail_after = fail_after
+        self.fail_count = fail_count
+        self.frame_index = 0
+        self._failed = 0
+        self._opened = True
+        self._next_time = time.perf_counter()
+
+    def isOpened(self):
+        return self._opened
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        if self.fail_after is not None and self.frame_index >= self.fail_after and self._failed < self.fail_count:
+            self._failed += 1
+            return False, None
+
+        # 按 fps 节奏出帧，模拟真实摄像头
+        now = time.perf_counter()
+        if self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time = max(self._next_time, now) + 1.0 / self.fps
+
+        import numpy as np
+        img = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        # 左上角写入帧序号 (小端 4 字节)，方便校验取到的是哪一帧
+        img[0, :4, 0] = np.frombuffer(int(self.frame_index).to_bytes(4, "little"), dtype=np.uint8)
+        img[1:, (self.frame_index * 4) % self.width, :] = 255
+        self.frame_index += 1
+        return True, img
+
+    def release(self):
+        self._opened = False
+
+
+def synthetic_frame_index(img):
+    """读取 SyntheticSource 写入的帧序号"""
+    return int.from_bytes(bytes(img[0, :4, 0]), "little")
+
+
+class CameraCapture:
+    """
+    低延迟采集：
+    1. 后台线程持续读取并只保留最新一帧，read() 永远返回上次之后的新帧，不会拿到缓冲区里积压的旧帧
+    2. 读取失败时按指数退避重新打开设备 (摄像头拔出 / 重新插入都能自动恢复)，不会空转占满 CPU
+    """
+
+    def __init__(self, source=0, width=320, height=240, fps=None, fourcc=None, buffer_size=1,
+                 max_failures=5, backoff_min=0.2, backoff_max=5.0, loop=False, on_status=None):
+        """
+        :param source: 摄像头编号、设备路径 / 流地址 (如 /dev/video0、rtsp://...、GStreamer 管道)、
+                       视频文件路径，或返回类 VideoCapture 对象的无参函数 (如 SyntheticSource)
+        :param fps: 请求的采集帧率，None 表示使用设备默认值
+        :param fourcc: 像素格式，如 "MJPG"、"YUYV"，None 表示使用设备默认值
+        :param buffer_size: CAP_PROP_BUFFERSIZE，越小延迟越低 (部分后端不支持)
+        :param max_failures: 连续读取失败多少次视为断开并重连
+        :param loop: 视频文件读到结尾后是否从头播放，否则结束采集
+        :param on_status: fn(说明)，断开 / 重连时调用
+        """
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.max_failures = max_failures
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.loop = loop
+        self.on_status = on_status
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_time = 0.0
+        self._seq = 0
+        self._read_seq = 0
+        self._running = False
+        self._finished = False
+        self._thread = None
+
+        # 统计信息
+        self.reconnects = 0
+        self.dropped = 0
+
+    @property
+    def is_file(self):
+        """只有普通文件按视频文件处理；设备路径、流地址等仍按摄像头设置参数并断线重连"""
+        return isinstance(self.source, str) and os.path.isfile(self.source)
+
+    def _open(self):
+        if callable(self.source):
+            return self.source()
+
+        import cv2
+        source = int(self.source) if isinstance(self.source, str) and self.source.isdigit() else self.source
+        cap = cv2.VideoCapture(source)
+        if self.is_file:
+            return cap
+        if self.fourcc:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.buffer_size:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        return cap
+
+    def _file_interval(self, cap):
+        """视频文件按原始帧率出帧，否则后台线程会以解码速度把文件读完"""
+        if not self.is_file:
+            return 0.0
+        import cv2
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return 1.0 / fps
+
+    def _status(self, text):
+        if self.on_status:
+            self.on_status(text)
+
+    def start(self):
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, name="CameraCapture", daemon=True)
+        self._thread.start()
+
+    def _grab_loop(self):
+        backoff = self.backoff_min
+        cap = None
+        while self._running:
+            if cap is None:
+                cap = self._open()
+                if not cap.isOpened():
+                    cap.release()
+                    cap = None
+                    self._status(f"摄像头不可用，{backoff:.1f} 秒后重试...")
+                    self._sleep(backoff)
+                    backoff = min(backoff * 2, self.backoff_max)
+                    continue
+                interval = self._file_interval(cap)
+                next_time = time.perf_counter()
+                failures = 0
+
+            success, img = cap.read()
+            if not success:
+                if self.is_file:
+                    cap.release()
+                    cap = None
+                    if not self.loop:
+                        break
+                    continue
+                failures += 1
+                if failures < self.max_failures:
+                    self._sleep(0.01)
+                    continue
+                # 连续失败：视为断开，释放后按退避时间重连
+                cap.release()
+                cap = None
+                self.reconnects += 1
+                self._status(f"摄像头断开，{backoff:.1f} 秒后重连...")
+                self._sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            if failures or backoff != self.backoff_min:
+                if backoff != self.backoff_min:
+                    self._status("摄像头已重新连接")
+                failures = 0
+                backoff = self.backoff_min
+
+            with self._cond:
+                if self._seq > self._read_seq:
+                    self.dropped += 1
+                self._frame = img
+                self._frame_time = time.time()
+                self._seq += 1
+                self._cond.notify_all()
+
+            if interval:
+                next_time += interval
+                self._sleep(next_time - time.perf_counter())
+
+        if cap is not None:
+            cap.release()
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def _sleep(self, seconds):
+        """可被 release() 打断的等待"""
+        end = time.perf_counter() + seconds
+        while self._running:
+            remaining = end - time.perf_counter()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 0.05))
+
+    def read(self, timeout=1.0):
+        """
+        等待并返回一帧比上次更新的画面
+        :return: (success, frame, timestamp)，超时或采集结束时 success 为 False
+        """
+        with self._cond:
+            end = time.perf_counter() + timeout
+            while self._seq == self._read_seq and not self._finished:
+                remaining = end - time.perf_counter()
+                if remaining <= 0:
+                    return False, None, 0.0
+                self._cond.wait(remaining)
+            if self._seq == self._read_seq:
+                return False, None, 0.0
+            self._read_seq = self._seq
+            return True, self._frame, self._frame_time
+
+    def isOpened(self):
+        """采集线程仍在运行 (设备暂时断开、等待重连时同样返回 True)"""
+        return self._running and not self._finished
+
+    def release(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
@@ -0,0 +1,311 @@
+import argparse
+import time
+
+import numpy as np
+
+from hand import classify_hand
+from recording import iter_session_paths, load_session
+
+# 模型文件格式版本，字段变更时递增
+MODEL_VERSION = 1
+MODEL_KINDS = ("centroid", "knn", "linear")
+
+
+def format_label(mode, action):
+    """("ONCE", "Up") -> "ONCE:Up"，无手势统一为 "NONE" """
+    if mode == "NONE" or action is None:
+        return "NONE"
+    return f"{mode}:{action}"
+
+
+def parse_label(label):
+    """"ONCE:Up" -> ("ONCE", "Up")"""
+    if not label or label == "NONE":
+        return "NONE", None
+    mode, _, action = label.partition(":")
+    return mode, action or None
+
+
+def landmarks_to_features(lms, aspect=1.0):
+    """
+    归一化特征：以手腕为原点，以手腕到中指根 (9) 的长度为单位
+    :param lms: (21, 3) 或 (N, 21, 3) 的归一化关键点
+    :param aspect: 画面高宽比 h / w (标量或长度为 N 的数组)，用于把 y 轴拉回与 x 轴同一尺度
+    :return: (N, 60) float32 特征 (去掉恒为 0 的手腕本身)
+    """
+    arr = np.asarray(lms, dtype=np.float32)
+    if arr.ndim == 2:
+        arr = arr[None]
+    arr = arr.copy()
+    arr[:, :, 1] *= np.asarray(aspect, dtype=np.float32).reshape(-1, 1)
+    rel = arr - arr[:, :1, :]
+    scale = np.maximum(np.linalg.norm(rel[:, 9, :2], axis=1), 1e-6)
+    rel /= scale[:, None, None]
+    return rel[:, 1:, :].reshape(len(arr), -1)
+
+
+def _softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _centroid_fit(x, y, num_classes, min_scale=0.1):
+    """
+    :return: (类中心, 每维的类内标准差)
+             按类内标准差缩放距离：手的轻微旋转会影响所有坐标，只靠少数几维区分的类 (如单指 / 双指) 才不会被淹没
+    """
+    centroids = np.stack([x[y == c].mean(axis=0) for c in range(num_classes)])
+    scale = np.sqrt(((x - centroids[y]) ** 2).mean(axis=0))
+    return centroids, np.maximum(scale, min_scale)
+
+
+def _centroid_distances(x, centroids, scale=1.0):
+    xs, cs = x / scale, centroids / scale
+    return (xs * xs).sum(axis=1)[:, None] - 2 * xs @ cs.T + (cs * cs).sum(axis=1)[None, :]
+
+
+def _fit_temperature(d, y):
+    """在一组距离上选使负对数似然最小的 softmax 温度"""
+    candidates = max(float(np.median(d)), 1e-6) * np.logspace(-4, 1, 51)
+    rows = np.arange(len(y))
+    nll = [-np.log(_softmax(-d / t)[rows, y] + 1e-12).mean() for t in candidates]
+    return float(candidates[int(np.argmin(nll))])
+
+
+class LandmarkClassifier:
+    """
+    基于关键点特征的手势分类器 (纯 NumPy)，可替代规则引擎
+    kind:
+        centroid - 最近类中心
+        knn      - k 近邻投票
+        linear   - softmax 线性模型
+    """
+
+    def __init__(self, kind, labels, mean, std, params, min_confidence=0.5):
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"未知的模型类型: {kind}")
+        self.kind = kind
+        self.labels = list(labels)
+        self.mean = mean
+        self.std = std
+        self.params = params
+        self.min_confidence = min_confidence
+        self._gestures = [parse_label(label) for label in self.labels]
+
+    # === 训练 ===
+    @classmethod
+    def train(cls, features, labels, kind="centroid", k=5, max_samples=5000, epochs=300, lr=0.5, l2=1e-3):
+        """
+        :param features: (N, D) 特征
+        :param labels: 长度为 N 的标签字符串列表
+        """
+        classes = sorted(set(labels))
+        y = np.array([classes.index(label) for label in labels])
+        mean = features.mean(axis=0)
+        std = features.std(axis=0) + 1e-6
+        x = (features - mean) / std
+
+        if kind == "centroid":
+            centroids, scale = _centroid_fit(x, y, len(classes))
+            # 温度在留出帧上拟合 (每类每 5 帧留出 1 帧，用其余帧重新求类中心)，置信度才与 min_confidence 可比
+            hold = np.zeros(len(y), dtype=bool)
+            for c in range(len(classes)):
+                idx = np.flatnonzero(y == c)
+                if len(idx) >= 5:
+                    hold[idx[::5]] = True
+            if hold.any():
+                fit_centroids, fit_scale = _centroid_fit(x[~hold], y[~hold], len(classes))
+                temperature = _fit_temperature(_centroid_distances(x[hold], fit_centroids, fit_scale), y[hold])
+            else:
+                temperature = _fit_temperature(_centroid_distances(x, centroids, scale), y)
+            params = {"centroids": centroids.astype(np.float32), "scale": scale.astype(np.float32),
+                      "temperature": np.float32(temperature)}
+
+        elif kind == "knn":
+            if len(x) > max_samples:
+                keep = np.random.default_rng(0).choice(len(x), max_samples, replace=False)
+                x, y = x[keep], y[keep]
+            params = {"samples": x.astype(np.float32), "sample_labels": y, "k": np.int32(k)}
+
+        elif kind == "linear":
+            n, d = x.shape
+            onehot = np.eye(len(classes), dtype=np.float32)[y]
+            weights = np.zeros((d, len(classes)), dtype=np.float32)
+            bias = np.zeros(len(classes), dtype=np.float32)
+            for _ in range(epochs):
+                grad = (_softmax(x @ weights + bias) - onehot) / n
+                weights -= lr * (x.T @ grad + l2 * weights)
+                bias -= lr * grad.sum(axis=0)
+            params = {"weights": weights, "bias": bias}
+
+        else:
+            raise ValueError(f"未知的模型类型: {kind}")
+
+        return cls(kind, classes, mean.astype(np.float32), std.astype(np.float32), params)
+
+    # === 推理 ===
+    def predict_proba(self, features):
+        """批量推理，返回 (N, C) 概率"""
+        x = (np.asarray(features, dtype=np.float32) - self.mean) / self.std
+
+        if self.kind == "centroid":
+            # 旧模型文件没有 scale，按未缩放的距离计算
+            d = _centroid_distances(x, self.params["centroids"], self.params.get("scale", 1.0))
+            return _softmax(-d / self.params["temperature"])
+
+        if self.kind == "knn":
+            s = self.params["samples"]
+            k = min(int(self.params["k"]), len(s))
+            d = (x * x).sum(axis=1)[:, None] - 2 * x @ s.T + (s * s).sum(axis=1)[None, :]
+            nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+            votes = self.params["sample_labels"][nearest]
+            proba = np.zeros((len(x), len(self.labels)), dtype=np.float32)
+            np.add.at(proba, (np.repeat(np.arange(len(x)), k), votes.ravel()), 1.0 / k)
+            return proba
+
+        return _softmax(x @ self.params["weights"] + self.params["bias"])
+
+    def predict(self, lms_batch, aspect=1.0):
+        """
+        :param lms_batch: (N, 21, 3) 归一化关键点
+        :return: [(模式, 动作, 置信度), ...]，置信度不足时模式为 "NONE"
+        """
+        if len(lms_batch) == 0:
+            return []
+        proba = self.predict_proba(landmarks_to_features(lms_batch, aspect))
+        best = proba.argmax(axis=1)
+        result = []
+        for idx, conf in zip(best, proba[np.arange(len(best)), best]):
+            mode, action = self._gestures[idx]
+            if conf < self.min_confidence:
+                mode, action = "NONE", None
+            result.append((mode, action, float(conf)))
+        return result
+
+    def predict_one(self, list_lms, w, h):
+        """与 classify_hand 相同的调用方式，返回 (模式, 动作)"""
+        mode, action, _ = self.predict([list_lms], h / w)[0]
+        return mode, action
+
+    def classify_hands(self, lms_list, w, h):
+        """与 hand.classify_hands 相同的批量接口，所有手一次推理"""
+        return self.predict(lms_list, h / w)
+
+    # === 模型文件 ===
+    def save(self, path):
+        np.savez(path,
+                 format_version=np.int32(MODEL_VERSION),
+                 kind=np.str_(self.kind),
+                 labels=np.array(self.labels),
+                 mean=self.mean,
+                 std=self.std,
+                 created=np.float64(time.time()),
+                 **{f"param_{k}": v for k, v in self.params.items()})
+
+    @classmethod
+    def load(cls, path, min_confidence=0.5):
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["format_version"])
+            if version != MODEL_VERSION:
+                raise ValueError(f"不支持的模型版本: {version} (当前 {MODEL_VERSION})")
+            params = {k[len("param_"):]: data[k] for k in data.files if k.startswith("param_")}
+            return cls(str(data["kind"]), [str(s) for s in data["labels"]],
+                       data["mean"], data["std"], params, min_confidence)
+
+
+def load_dataset(paths):
+    """
+    从录制文件中取出带标注的单手帧
+    :return: (lms (N, 21, 3), labels, sizes (N, 2) 即每帧的 (w, h))
+    """
+    lms, labels, sizes = [], [], []
+    for path in iter_session_paths(paths):
+        header, frames = load_session(path)
+        for frame in frames:
+            if frame["hands"] and frame.get("label"):
+                lms.append(frame["hands"][0]["lms"])
+                labels.append(frame["label"])
+                sizes.append((header["width"], header["height"]))
+    return np.array(lms, dtype=np.float32).reshape(-1, 21, 3), labels, np.array(sizes).reshape(-1, 2)
+
+
+def cmd_train(args):
+    lms, labels, sizes = load_dataset(args.sessions)
+    if not labels:
+        raise SystemExit("录制文件中没有带标注的帧")
+    features = landmarks_to_features(lms, sizes[:, 1] / sizes[:, 0])
+    model = LandmarkClassifier.train(features, labels, kind=args.kind, k=args.k)
+    model.save(args.output)
+    counts = {label: labels.count(label) for label in model.labels}
+    print(f"已训练 {args.kind} 模型: {len(labels)} 帧, {len(model.labels)} 类 -> {args.output}")
+    for label, n in counts.items():
+        print(f"  {label:<16}{n}")
+
+
+def cmd_report(args):
+    lms, labels, sizes = load_dataset(args.sessions)
+    if not labels:
+        raise SystemExit("录制文件中没有带标注的帧")
+    model = LandmarkClassifier.load(args.model, args.min_confidence)
+    n = len(labels)
+
+    # 规则引擎：逐帧调用
+    start = time.perf_counter()
+    rule_pred = [format_label(*classify_hand(lms[i], sizes[i][0], sizes[i][1])) for i in range(n)]
+    rule_ms = (time.perf_counter() - start) * 1000 / n
+
+    # 分类器：整批推理
+    start = time.perf_counter()
+    batch = model.predict(lms, sizes[:, 1] / sizes[:, 0])
+    batch_ms = (time.perf_counter() - start) * 1000 / n
+    model_pred = [format_label(mode, action) for mode, action, _ in batch]
+
+    # 分类器：单帧延迟 (实时场景下每帧只推理一只手)
+    timings = []
+    for i in range(min(n, 200)):
+        start = time.perf_counter()
+        model.predict_one(lms[i], sizes[i][0], sizes[i][1])
+        timings.append(time.perf_counter() - start)
+    single_ms = float(np.median(timings)) * 1000
+
+    rule_acc = sum(p == t for p, t in zip(rule_pred, labels)) / n
+    model_acc = sum(p == t for p, t in zip(model_pred, labels)) / n
+
+    print(f"样本: {n} 帧, 模型: {model.kind} ({args.model})")
+    print(f"{'':<18}{'准确率':>10}{'ms/帧':>12}")
+    print(f"{'规则引擎':<18}{rule_acc:>10.2%}{rule_ms:>12.4f}")
+    print(f"{'分类器 (批量)':<18}{model_acc:>10.2%}{batch_ms:>12.4f}")
+    print(f"{'分类器 (单帧)':<18}{'':>10}{single_ms:>12.4f}")
+    print()
+    print(f"{'标签':<16}{'帧数':>8}{'规则':>10}{'分类器':>10}")
+    for label in sorted(set(labels)):
+        idx = [i for i, t in enumerate(labels) if t == label]
+        r = sum(rule_pred[i] == label for i in idx) / len(idx)
+        m = sum(model_pred[i] == label for i in idx) / len(idx)
+        print(f"{label:<16}{len(idx):>8}{r:>10.2%}{m:>10.2%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="关键点手势分类器：训练与对比报告")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_train = sub.add_parser("train", help="从录制文件训练模型")
+    p_train.add_argument("sessions", nargs="+", help="录制文件或目录")
+    p_train.add_argument("-o", "--output", default="gesture_model.npz", help="模型输出路径")
+    p_train.add_argument("--kind", choices=MODEL_KINDS, default="centroid")
+    p_train.add_argument("--k", type=int, default=5, help="knn 的 k 值")
+    p_train.set_defaults(func=cmd_train)
+
+    p_report = sub.add_parser("report", help="与规则引擎对比准确率与延迟")
+    p_report.add_argument("sessions", nargs="+", help="录制文件或目录 (建议使用未参与训练的数据)")
+    p_report.add_argument("--model", required=True)
+    p_report.add_argument("--min-confidence", type=float, default=0.5)
+    p_report.set_defaults(func=cmd_report)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
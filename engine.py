@@ -0,0 +1,303 @@
+import argparse
+import collections
+import importlib
+import time
+
+from capture import CameraCapture
+from hand import classify_hands
+from profiles import get_profile
+from recording import SessionWriter
+from tracker import HandTracker
+
+
+class GestureEngine:
+    """
+    手势识别核心 (不依赖 Qt)：摄像头采集 -> MediaPipe 推理 -> 手势分类 -> 触发判断
+    通过监听函数对外输出：
+        事件监听: fn(event)，event = {"mode", "action", "timestamp", "confidence", "hand"}
+        画面监听: fn(img, visible)，img 为已绘制关键点的 BGR 图像，没有画面监听时跳过绘制
+    """
+
+    def __init__(self, camera=0, classifier=None, max_num_hands=2, record_path=None, record_label=None,
+                 profile=None, fourcc=None, buffer_size=1, flight_recorder=None):
+        """
+        :param profile: 性能档位 (见 profiles.py)，决定采集尺寸、模型复杂度、帧率上限和触发间隔
+        :param flight_recorder: 可选的 flight_recorder.FlightRecorder，保存最近几秒的现场
+        """
+        self._is_running = True
+
+        # 采集参数，见 capture.CameraCapture
+        self.camera = camera
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.max_num_hands = max_num_hands
+
+        self.profile = dict(profile or get_profile())
+        self._pending_profile = None
+
+        # 可选的关键点分类器 (classifier.LandmarkClassifier)，为 None 时使用 hand.py 的规则引擎
+        self.classifier = classifier
+        # 可选的关键点录制，供训练分类器使用
+        self.record_path = record_path
+        self.record_label = record_label
+        self.flight_recorder = flight_recorder
+
+        # 每只手独立的触发状态、控制手锁定与双手手势
+        # 连续触发的时间间隔由档位的 continuous_interval 决定
+        # 只跟踪一只手时不会有双手缩放，指令无需延迟
+        self.tracker = HandTracker(self.profile["continuous_interval"],
+                                   zoom_grace=0.5 if max_num_hands >= 2 else 0.0)
+
+        # 运行统计：已处理帧数、最近 1000 帧的 采集 -> 判定 延迟 (秒)
+        self.frames_processed = 0
+        self.latencies = collections.deque(maxlen=1000)
+
+        self._event_listeners = []
+        self._frame_listeners = []
+
+        # warm_up() 准备好的摄像头与模型
+        self._cap = None
+        self._hands = None
+
+    def add_event_listener(self, fn):
+        self._event_listeners.append(fn)
+
+    def add_frame_listener(self, fn):
+        self._frame_listeners.append(fn)
+
+    def set_profile(self, profile):
+        """运行中切换档位，可从任意线程调用，下一帧开始时生效"""
+        self._pending_profile = dict(profile)
+
+    def _create_capture(self, progress=None):
+        p = self.profile
+        cap = CameraCapture(self.camera, p["width"], p["height"], p["capture_fps"], self.fourcc,
+                            self.buffer_size, on_status=progress)
+        cap.start()
+        return cap
+
+    def _create_hands(self):
+        import mediapipe as mp
+        p = self.profile
+        return mp.solutions.hands.Hands(max_num_hands=self.max_num_hands,
+                                        model_complexity=p["model_complexity"],
+                                        min_detection_confidence=p["min_detection_confidence"],
+                                        min_tracking_confidence=p["min_tracking_confidence"])
+
+    def _apply_pending_profile(self, progress=None):
+        old, self.profile = self.profile, self._pending_profile
+        self._pending_profile = None
+        self.tracker.set_continuous_interval(self.profile["continuous_interval"])
+        # 只重建真正受影响的部分
+        if any(old[k] != self.profile[k] for k in ("width", "height", "capture_fps")):
+            self._cap.release()
+            self._cap = self._create_capture(progress)
+        if any(old[k] != self.profile[k] for k in ("model_complexity", "min_detection_confidence",
+                                                   "min_tracking_confidence")):
+            self._hands.close()
+            self._hands = self._create_hands()
+
+    def warm_up(self, progress=None):
+        """
+        加载视觉库、打开摄像头并初始化 MediaPipe 模型 (耗时数秒)，run() 会在需要时自动调用
+        :param progress: fn(阶段说明)，每个阶段开始前调用一次
+        """
+        def report(stage):
+            if progress:
+                progress(stage)
+
+        # OpenCV / MediaPipe 只在这里导入 (只为分阶段加载，模块本身在用到的地方再取)，
+        # --no-gesture 或订阅模式下不会加载
+        report("加载 OpenCV...")
+        importlib.import_module("cv2")
+        report("加载 MediaPipe...")
+        importlib.import_module("mediapipe")
+
+        report("打开摄像头...")
+        self._cap = self._create_capture(progress)
+
+        report("初始化手部模型...")
+        self._hands = self._create_hands()
+
+    def run(self, progress=None):
+        """
+        阻塞运行，直到 stop() 被调用或摄像头关闭
+        :param progress: 同 warm_up，另外在首帧处理完成后报告 "就绪"
+        """
+        if not self._is_running:
+            return
+        if self._hands is None:
+            self.warm_up(progress)
+
+        import cv2
+        import mediapipe as mp
+        mp_hands = mp.solutions.hands
+        mp_draw = mp.solutions.drawing_utils
+        first_frame = True
+        last_start = 0.0
+        last_preview = 0.0
+
+        # 录制文件在收到第一帧后创建，文件头记录真实画面尺寸 (摄像头可能忽略请求的分辨率，视频文件不缩放)
+        recorder = None
+
+        try:
+            while self._is_running and self._cap.isOpened():
+                if self._pending_profile is not None:
+                    self._apply_pending_profile(progress)
+
+                # 推理帧率上限：等到时间再取帧，取到的仍是最新画面
+                inference_fps = self.profile["inference_fps"]
+                if inference_fps:
+                    delay = last_start + 1.0 / inference_fps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                last_start = time.perf_counter()
+
+                # 阻塞等待一帧新画面 (最多 1 秒)，断线重连期间不会空转
+                success, img, frame_time = self._cap.read(timeout=1.0)
+                if not success:
+                    continue
+
+                img = cv2.flip(img, 1)
+                h, w, _ = img.shape
+                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+                results = self._hands.process(img_rgb)
+
+                # 预览帧率上限：不需要预览的帧跳过绘制和转换
+                preview_fps = self.profile["preview_fps"]
+                draw = bool(self._frame_listeners) and (
+                    not preview_fps or last_start - last_preview >= 1.0 / preview_fps)
+                if draw:
+                    last_preview = last_start
+
+                detections = []
+                if results.multi_hand_landmarks:
+                    for hand, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                        label = handedness.classification[0]
+                        detections.append({"lms": [[lm.x, lm.y, lm.z] for lm in hand.landmark],
+                                           "handedness": label.label, "score": label.score})
+
+                now = time.time()
+                if self.record_path:
+                    if recorder is None:
+                        recorder = SessionWriter(self.record_path, w, h, self.record_label)
+                    recorder.write_frame(now, detections)
+
+                # 所有手一次批量分类
+                lms_list = [d["lms"] for d in detections]
+                if self.classifier is not None:
+                    gestures = self.classifier.classify_hands(lms_list, w, h)
+                else:
+                    gestures = classify_hands(lms_list, w, h)
+
+                # === 核心交互逻辑 (每只手独立触发，见 tracker.py) ===
+                visible, events = self.tracker.update(detections, gestures, now)
+                for mode, action, confidence, hand_id in events:
+                    event = {"mode": mode, "action": action, "timestamp": now,
+                             "confidence": round(confidence, 3), "hand": hand_id}
+                    for fn in self._event_listeners:
+                        fn(event)
+                self.frames_processed += 1
+                self.latencies.append(time.time() - frame_time)
+
+                # 在绘制之前交给黑匣子，保存的是原始画面
+                if self.flight_recorder:
+                    self.flight_recorder.add(now, img, detections, gestures, events)
+
+                if draw:
+                    for hand in results.multi_hand_landmarks or ():
+                        mp_draw.draw_landmarks(img, hand, mp_hands.HAND_CONNECTIONS)
+                    self._draw_overlay(img, visible)
+                    for fn in self._frame_listeners:
+                        fn(img, visible)
+
+                if first_frame:
+                    first_frame = False
+                    if progress:
+                        progress("就绪")
+        finally:
+            self._cap.release()
+            self._hands.close()
+            self._cap = None
+            self._hands = None
+            if recorder:
+                recorder.close()
+
+    def _draw_overlay(self, img, visible):
+        """=== OSD 显示调试信息 ==="""
+        import cv2
+        h, w, _ = img.shape
+        for hand in visible:
+            wrist = hand.lms[0]
+            color = (0, 255, 0) if hand.id == self.tracker.lock_id else (0, 0, 255)
+            cv2.putText(img, f"#{hand.id}", (int(wrist[0] * w), int(wrist[1] * h) + 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        shown = [hand for hand in visible if hand.action]
+        if len(shown) == 1:
+            display_text = f"{shown[0].mode}: {shown[0].action}"
+            # 1. 位置 (10, 40) - 稍微下移适应大字体
+            # 2. 字体比例 1.2 - 增大
+            # 3. 颜色 (0, 0, 255) - 红色 (OpenCV是BGR格式)
+            # 4. 线宽 3 - 加粗
+            cv2.putText(img, display_text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX,
+                        1.2, (0, 0, 255), 3)
+        else:
+            for row, hand in enumerate(shown):
+                cv2.putText(img, f"#{hand.id} {hand.mode}: {hand.action}", (10, 30 + row * 28),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+    def stop(self):
+        self._is_running = False
+
+
+def main(argv=None):
+    from events import EventServer
+
+    parser = argparse.ArgumentParser(description="无界面手势引擎：识别结果以 JSON 行推送给订阅者")
+    parser.add_argument("--camera", default="0", help="摄像头编号、设备路径 (/dev/video0)、流地址或视频文件路径")
+    parser.add_argument("--profile", help="性能档位: low-power / balanced / low-latency 或自定义")
+    parser.add_argument("--profile-file", help="自定义档位 JSON 文件")
+    parser.add_argument("--fps", type=float, help="请求的采集帧率 (覆盖档位设置)")
+    parser.add_argument("--fourcc", help="采集像素格式，如 MJPG、YUYV")
+    parser.add_argument("--buffer-size", type=int, default=1, help="摄像头内部缓冲帧数，越小延迟越低")
+    parser.add_argument("--listen", default="tcp:127.0.0.1:8765",
+                        help="推送地址，tcp:HOST:PORT 或 unix:PATH")
+    parser.add_argument("--model", help="使用训练好的关键点分类器代替规则引擎")
+    parser.add_argument("--min-confidence", type=float, default=0.5, help="分类器最低置信度")
+    parser.add_argument("--max-hands", type=int, default=2, help="同时跟踪的最大手数")
+    parser.add_argument("--lock-hand", action="store_true", help="只允许第一只做出手势的手控制")
+    parser.add_argument("--quiet", action="store_true", help="不在终端打印事件")
+    args = parser.parse_args(argv)
+
+    classifier = None
+    if args.model:
+        from classifier import LandmarkClassifier
+        classifier = LandmarkClassifier.load(args.model, args.min_confidence)
+
+    profile = get_profile(args.profile, args.profile_file)
+    if args.fps:
+        profile["capture_fps"] = args.fps
+    engine = GestureEngine(args.camera, classifier, args.max_hands, profile=profile,
+                           fourcc=args.fourcc, buffer_size=args.buffer_size)
+    engine.tracker.lock_enabled = args.lock_hand
+
+    server = EventServer(args.listen)
+    try:
+        server.start()
+    except OSError as err:
+        raise SystemExit(f"无法监听 {args.listen}: {err}")
+    engine.add_event_listener(server.publish)
+    if not args.quiet:
+        engine.add_event_listener(lambda e: print(f"[{e['mode']}] {e['action']} ({e['confidence']:.2f})"))
+    print(f"手势引擎已启动，推送地址: {args.listen}")
+
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+import argparse
+import collections
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from classifier import format_label
+from hand import HULL_INDEX, classify_hand
+from recording import SESSION_EXT, SessionWriter, load_session
+
+DEFAULT_CACHE_DIR = ".eval_cache"
+# 与 ui.py 相同 (这里不导入 ui，避免加载 Qt)
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv')
+
+# 可供扫描的凸包参考点组合，也可以在命令行直接写索引，如 0,1,2,5,9,13,17
+HULL_SETS = {
+    "default": HULL_INDEX,
+    # 只用手腕、拇指根部和各指 MCP：手指稍微弯曲也算伸出
+    "mcp": [0, 1, 2, 5, 9, 13, 17],
+    # 不用小指 DIP：小指半弯时不容易误判为伸出
+    "pip": [0, 1, 2, 3, 6, 10, 14, 18, 17],
+}
+
+
+# === 1. 数据来源与关键点缓存 ===
+def find_sources(paths):
+    """展开文件/目录参数，返回排序后的录制文件和视频文件"""
+    result = []
+    for p in paths:
+        names = [os.path.join(p, n) for n in sorted(os.listdir(p))] if os.path.isdir(p) else [p]
+        result.extend(n for n in names if n.endswith(SESSION_EXT) or n.lower().endswith(VIDEO_EXTENSIONS))
+    return result
+
+
+def video_labels_path(video_path):
+    return os.path.splitext(video_path)[0] + ".labels.json"
+
+
+def load_video_labels(video_path):
+    """
+    视频的标注文件 <文件名>.labels.json：
+        整段同一手势: "ONCE:Up"
+        分段标注: [[开始秒, 结束秒, "模式:动作"], ...]，不在任何区间内的帧不参与评分
+    :return: fn(t) -> 标签或 None
+    """
+    with open(video_labels_path(video_path), "r", encoding="utf-8") as f:
+        labels = json.load(f)
+    if isinstance(labels, str):
+        return lambda t: labels
+    return lambda t: next((label for start, end, label in labels if start <= t < end), None)
+
+
+def cache_path(source, cache_dir, model_complexity, flip):
+    """
+    缓存键包含文件路径、大小、修改时间和提取参数，源文件变化后自动重新提取；
+    视频的标注不在缓存中 (评分时读取)，修改标注不需要重新提取
+    """
+    st = os.stat(source)
+    parts = [os.path.abspath(source), st.st_size, st.st_mtime_ns]
+    if not source.endswith(SESSION_EXT):
+        parts += [model_complexity, flip]
+    key = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir, f"{name}-{key}.npz")
+
+
+def extract_video(video_path, session_path, model_complexity=1, flip=True):
+    """
+    用 MediaPipe 逐帧提取关键点，保存为录制文件 (与 --record 格式相同)
+    :param flip: 与 engine.py 一致先做水平镜像，摄像头原始录像应保持 True
+    :return: 处理的帧数
+    """
+    import cv2
+    import mediapipe as mp
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    writer = SessionWriter(session_path, w, h)
+    count = 0
+    with mp.solutions.hands.Hands(max_num_hands=2, model_complexity=model_complexity,
+                                  min_detection_confidence=0.7, min_tracking_confidence=0.5) as hands:
+        while True:
+            success, img = cap.read()
+            if not success:
+                break
+            if flip:
+                img = cv2.flip(img, 1)
+            results = hands.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            detections = []
+            if results.multi_hand_landmarks:
+                for hand, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                    label = handedness.classification[0]
+                    detections.append({"lms": [[lm.x, lm.y, lm.z] for lm in hand.landmark],
+                                       "handedness": label.label, "score": label.score})
+            writer.write_frame(count / fps, detections)
+            count += 1
+    cap.release()
+    writer.close()
+    return count
+
+
+def prepare_source(task):
+    """
+    (在工作进程中) 把一个来源转换为关键点数组缓存：有手的帧的时间、第一只手的关键点、
+    录制时的标注 (视频为空) 和画面尺寸
+    :param task: (来源路径, 缓存路径, model_complexity, flip)
+    :return: (缓存路径, 有手的帧数, 提取的视频帧数, 提取耗时)
+    """
+    source, npz_path, model_complexity, flip = task
+    extracted, elapsed = 0, 0.0
+    session_path = source
+    if not source.endswith(SESSION_EXT):
+        session_path = os.path.splitext(npz_path)[0] + SESSION_EXT
+        start = time.perf_counter()
+        extracted = extract_video(source, session_path, model_complexity, flip)
+        elapsed = time.perf_counter() - start
+
+    header, frames = load_session(session_path)
+    ts, lms, labels = [], [], []
+    for frame in frames:
+        if frame["hands"]:
+            ts.append(frame["t"])
+            lms.append(frame["hands"][0]["lms"])
+            labels.append(frame.get("label") or "")
+    np.savez(npz_path, t=np.array(ts, dtype=np.float64), lms=np.array(lms, dtype=np.float64).reshape(-1, 21, 3),
+             labels=np.array(labels, dtype=str), size=np.array([header["width"], header["height"]]))
+    return npz_path, len(ts), extracted, elapsed
+
+
+# === 2. 评分 ===
+def score(task):
+    """
+    (在工作进程中) 用一组参数对一个缓存重新分类，只统计有标注的帧
+    :param task: (来源路径, 缓存路径, 参数 dict)；视频来源在这里读取最新的 .labels.json
+    :return: (混淆计数 {(真实, 预测): 次数}, 帧数, 耗时)
+    """
+    source, npz_path, params = task
+    with np.load(npz_path) as data:
+        ts = data["t"].tolist()
+        lms = data["lms"].tolist()
+        labels = data["labels"].tolist()
+        w, h = (int(v) for v in data["size"])
+    if not source.endswith(SESSION_EXT):
+        get_label = load_video_labels(source)
+        labels = [get_label(t) or "" for t in ts]
+
+    counts = collections.Counter()
+    start = time.perf_counter()
+    n = 0
+    for list_lms, label in zip(lms, labels):
+        if label:
+            counts[(label, format_label(*classify_hand(list_lms, w, h, **params)))] += 1
+            n += 1
+    return counts, n, time.perf_counter() - start
+
+
+def metrics(counts):
+    """
+    :return: (准确率, 宏平均 F1, {标签: (帧数, 精确率, 召回率, F1)})
+    """
+    labels = sorted({t for t, _ in counts} | {p for _, p in counts})
+    total = sum(counts.values())
+    correct = sum(n for (t, p), n in counts.items() if t == p)
+    per_label = {}
+    for label in labels:
+        tp = counts.get((label, label), 0)
+        support = sum(n for (t, _), n in counts.items() if t == label)
+        predicted = sum(n for (_, p), n in counts.items() if p == label)
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_label[label] = (support, precision, recall, f1)
+    true_labels = [label for label in labels if per_label[label][0]]
+    macro_f1 = sum(per_label[label][3] for label in true_labels) / max(len(true_labels), 1)
+    return correct / max(total, 1), macro_f1, per_label
+
+
+def parse_hull(text):
+    if text in HULL_SETS:
+        return HULL_SETS[text]
+    return [int(i) for i in text.split(",")]
+
+
+def parameter_grid(ratios, hulls, sectors):
+    """:return: [(名称, 参数 dict), ...]"""
+    grid = []
+    for ratio, hull, sector in itertools.product(ratios, hulls, sectors):
+        name = f"ratio={ratio} hull={hull} sector={sector}"
+        grid.append((name, {"min_vector_length_ratio": ratio, "hull_index": parse_hull(hull),
+                            "horizontal_half_angle": sector}))
+    return grid
+
+
+def run_tasks(fn, tasks, jobs):
+    """jobs 为 1 时在当前进程顺序执行，便于调试"""
+    if jobs == 1:
+        return [fn(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(fn, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+
+# === 3. 报告 ===
+def print_detail(name, counts):
+    accuracy, macro_f1, per_label = metrics(counts)
+    labels = list(per_label)
+    print(f"\n{name}: 准确率 {accuracy:.2%}, 宏平均 F1 {macro_f1:.3f}")
+    print(f"{'标签':<16}{'帧数':>8}{'精确率':>10}{'召回率':>10}{'F1':>8}")
+    for label, (support, precision, recall, f1) in per_label.items():
+        print(f"{label:<16}{support:>8}{precision:>10.2%}{recall:>10.2%}{f1:>8.3f}")
+
+    print("\n混淆矩阵 (行: 真实标签, 列: 预测标签编号)")
+    print(f"{'':<20}" + "".join(f"{i:>7}" for i in range(len(labels))))
+    for i, t in enumerate(labels):
+        print(f"{i:>2} {t:<17}" + "".join(f"{counts.get((t, p), 0):>7}" for p in labels))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线评估规则引擎：多进程提取关键点并缓存，按参数组合重新评分")
+    parser.add_argument("sources", nargs="+",
+                        help="录制文件 (.jsonl)、视频文件或目录；视频需要同名的 .labels.json 标注")
+    parser.add_argument("--ratio", type=float, nargs="+", default=[0.2], help="min_vector_length_ratio 的取值")
+    parser.add_argument("--hull", nargs="+", default=["default"],
+                        help=f"凸包参考点: {' / '.join(HULL_SETS)} 或逗号分隔的索引")
+    parser.add_argument("--sector", type=float, nargs="+", default=[45],
+                        help="左 / 右方向扇区的半角 (度)，默认 45 即四个方向均分")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="进程数，默认使用全部核心")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="关键点缓存目录")
+    parser.add_argument("--model-complexity", type=int, default=1, help="提取视频关键点时的 MediaPipe 模型复杂度")
+    parser.add_argument("--no-flip", action="store_true", help="视频已是镜像画面，提取时不再水平翻转")
+    parser.add_argument("--top", type=int, default=10, help="排名表显示的组合数")
+    parser.add_argument("--detail", type=int, default=1, help="输出前几名组合的分标签指标和混淆矩阵")
+    parser.add_argument("--json", metavar="PATH", help="把所有组合的混淆计数和指标写入 JSON")
+    args = parser.parse_args(argv)
+
+    # 1. 关键点：只处理没有缓存的来源
+    sources = []
+    for source in find_sources(args.sources):
+        if source.endswith(SESSION_EXT) or os.path.exists(video_labels_path(source)):
+            sources.append(source)
+        else:
+            print(f"跳过没有标注的视频: {source}")
+    if not sources:
+        raise SystemExit("没有找到录制文件或视频")
+    os.makedirs(args.cache_dir, exist_ok=True)
+    flip = not args.no_flip
+    cached = [cache_path(s, args.cache_dir, args.model_complexity, flip) for s in sources]
+    todo = [(s, c, args.model_complexity, flip) for s, c in zip(sources, cached) if not os.path.exists(c)]
+    start = time.perf_counter()
+    prepared = run_tasks(prepare_source, todo, args.jobs)
+    prepare_wall = time.perf_counter() - start
+    extracted = sum(r[2] for r in prepared)
+    print(f"来源: {len(sources)} 个 (缓存命中 {len(sources) - len(todo)})，准备耗时 {prepare_wall:.1f} s")
+    if extracted:
+        extract_time = sum(r[3] for r in prepared)
+        print(f"视频提取: {extracted} 帧，单进程 {extracted / extract_time:.1f} fps，"
+              f"整体 {extracted / prepare_wall:.1f} fps")
+
+    # 2. 所有 参数组合 x 来源 并行评分
+    grid = parameter_grid(args.ratio, args.hull, args.sector)
+    tasks = [(s, c, params) for _, params in grid for s, c in zip(sources, cached)]
+    start = time.perf_counter()
+    results = run_tasks(score, tasks, args.jobs)
+    score_wall = time.perf_counter() - start
+
+    per_variant = [collections.Counter() for _ in grid]
+    frames, busy = 0, 0.0
+    for i, (counts, n, elapsed) in enumerate(results):
+        per_variant[i // len(cached)].update(counts)
+        frames += n
+        busy += elapsed
+    if not frames:
+        raise SystemExit("没有带标注的帧")
+    print(f"评分: {len(grid)} 组参数 x {frames // len(grid)} 帧，{args.jobs} 个进程，耗时 {score_wall:.1f} s，"
+          f"整体 {frames / score_wall:,.0f} 帧/秒 (单进程 {frames / max(busy, 1e-9):,.0f} 帧/秒)")
+
+    # 3. 排名与详细报告
+    ranked = sorted(range(len(grid)), key=lambda i: metrics(per_variant[i])[:2], reverse=True)
+    print(f"\n{'排名':<6}{'准确率':>10}{'宏平均F1':>10}  参数")
+    for rank, i in enumerate(ranked[:args.top], 1):
+        accuracy, macro_f1, _ = metrics(per_variant[i])
+        print(f"{rank:<6}{accuracy:>10.2%}{macro_f1:>10.3f}  {grid[i][0]}")
+    for i in ranked[:args.detail]:
+        print_detail(grid[i][0], per_variant[i])
+
+    if args.json:
+        report = []
+        for (name, params), counts in zip(grid, per_variant):
+            accuracy, macro_f1, per_label = metrics(counts)
+            report.append({
+                "name": name,
+                "params": params,
+                "accuracy": accuracy,
+                "macro_f1": macro_f1,
+                "per_label": {label: dict(zip(("support", "precision", "recall", "f1"), values))
+                              for label, values in per_label.items()},
+                "confusion": [[t, p, n] for (t, p), n in sorted(counts.items())],
+            })
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"\n已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
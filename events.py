@@ -0,0 +1,112 @@
+import errno
+import json
+import os
+import socket
+import threading
+
+# 单个订阅者发送超时 (秒)，超时视为订阅者卡死并断开，避免拖慢识别线程
+SEND_TIMEOUT = 0.05
+
+
+def parse_address(address):
+    """
+    解析推送地址
+    :param address: "tcp:HOST:PORT"、"HOST:PORT" 或 "unix:PATH"
+    :return: (socket family, 地址)
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("tcp:"):
+        address = address[len("tcp:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class EventServer:
+    """
+    手势事件推送：每个事件编码为一行 JSON，广播给所有已连接的订阅者
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.family, self.bind_address = parse_address(address)
+        self._clients = []
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        """
+        :raise OSError: 地址已被占用 (Unix 套接字文件上已有进程在监听时同样拒绝启动，不会抢占)
+        """
+        if self.family == socket.AF_UNIX and os.path.exists(self.bind_address):
+            # 能连上说明另一个引擎正在使用；连不上则是异常退出留下的套接字文件，可以删除
+            try:
+                connect(self.address, timeout=1.0).close()
+            except OSError:
+                os.unlink(self.bind_address)
+            else:
+                raise OSError(errno.EADDRINUSE, f"已有进程在监听 {self.address}")
+        self._sock = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(self.bind_address)
+        self._sock.listen()
+        self._thread = threading.Thread(target=self._accept_loop, name="EventServer", daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                # close() 关闭了监听套接字
+                return
+            client.settimeout(SEND_TIMEOUT)
+            with self._lock:
+                self._clients.append(client)
+
+    def publish(self, event):
+        data = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            alive = []
+            for client in self._clients:
+                try:
+                    client.sendall(data)
+                    alive.append(client)
+                except OSError:
+                    client.close()
+            self._clients = alive
+
+    @property
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def close(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients = []
+        if self.family == socket.AF_UNIX and os.path.exists(self.bind_address):
+            os.unlink(self.bind_address)
+
+
+def connect(address, timeout=None):
+    family, target = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(target)
+    return sock
+
+
+def iter_events(sock):
+    """逐个读取事件 (dict)，连接关闭时结束"""
+    with sock.makefile("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
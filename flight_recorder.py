@@ -0,0 +1,135 @@
+import collections
+import os
+import queue
+import threading
+import time
+
+from recording import SessionWriter
+
+# 每只手的关键点 (21 x 3 个 float 的列表) 在内存中的大致占用
+_HAND_BYTES = 3000
+
+
+class FlightRecorder:
+    """
+    手势 "黑匣子"：在内存中循环保存最近几秒的画面 (缩小 + JPEG)、关键点和分类结果，
+    手势误触发时把现场写到磁盘，供离线回放分析
+
+    推理线程只做缩小 (同时得到一份独立的拷贝) 并放入有界队列，JPEG 编码和写盘都在后台线程，
+    队列满时直接丢弃该帧，永远不会阻塞推理
+    内存上限 = 环形缓冲区 max_bytes + 队列中最多 queue_size 张缩小后的画面
+    """
+
+    def __init__(self, seconds=10.0, max_bytes=8 * 1024 * 1024, scale=0.5, quality=70, queue_size=4,
+                 out_dir="flights"):
+        """
+        :param seconds: 保留最近多少秒
+        :param max_bytes: 环形缓冲区的内存上限 (JPEG + 关键点)，超出时丢弃最早的帧
+        :param scale: 画面缩放比例
+        :param quality: JPEG 质量 (0~100)
+        :param out_dir: dump() 的输出目录
+        """
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.scale = scale
+        self.quality = quality
+        self.out_dir = out_dir
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._ring = collections.deque()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.frame_size = None
+        # 本次运行 dump 的次数，作为目录名的序号
+        self._dump_seq = 0
+
+        # 统计信息
+        self.bytes_used = 0
+        self.dropped = 0
+
+    def _shrink(self, img):
+        import cv2
+        return cv2.resize(img, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def _encode(self, img):
+        import cv2
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else b""
+
+    def add(self, t, img, detections, gestures, events):
+        """
+        在推理线程调用，返回后调用方可以继续修改 img (如绘制关键点)
+        :param detections: [{"lms", "handedness", "score"}, ...]
+        :param gestures: [(模式, 动作, 置信度), ...]
+        :param events: 本帧触发的指令 [(模式, 动作, 置信度, 手 ID), ...]
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._encode_loop, name="FlightRecorder", daemon=True)
+            self._thread.start()
+        h, w = img.shape[:2]
+        self.frame_size = (w, h)
+        try:
+            self._queue.put_nowait((t, self._shrink(img), detections, gestures, events))
+        except queue.Full:
+            self.dropped += 1
+
+    def _encode_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            t, img, detections, gestures, events = item
+            jpeg = self._encode(img)
+            size = len(jpeg) + _HAND_BYTES * len(detections)
+            with self._lock:
+                self._ring.append((t, jpeg, detections, gestures, events, size))
+                self.bytes_used += size
+                # 超出时长或内存上限：丢弃最早的帧
+                while self._ring and (self.bytes_used > self.max_bytes or self._ring[0][0] < t - self.seconds):
+                    self.bytes_used -= self._ring.popleft()[5]
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._ring)
+
+    def dump(self, reason="manual"):
+        """
+        把当前缓冲区写到 out_dir/flight-时间-毫秒-序号-原因/，写盘在后台线程进行
+        目录中 session.jsonl 与 recording.py 的录制格式相同 (可直接用 replay.py 回放)，
+        每帧额外记录画面文件名、分类结果和触发的指令；画面保存在 frames/
+        :return: 输出目录，缓冲区为空时返回 None
+        """
+        frames = self.snapshot()
+        if not frames or self.frame_size is None:
+            return None
+        # 同一秒内可能连续 dump (如 F8 后紧接着撤销跳转)，加上毫秒和序号避免写进同一目录
+        now = time.time()
+        self._dump_seq += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        folder = os.path.join(self.out_dir, f"flight-{stamp}-{int(now * 1000) % 1000:03d}-{self._dump_seq}-{reason}")
+        threading.Thread(target=self._write, args=(folder, frames, self.frame_size),
+                         name="FlightRecorderDump", daemon=True).start()
+        return folder
+
+    @staticmethod
+    def _write(folder, frames, frame_size):
+        os.makedirs(os.path.join(folder, "frames"), exist_ok=True)
+        writer = SessionWriter(os.path.join(folder, "session.jsonl"), *frame_size)
+        try:
+            for i, (t, jpeg, detections, gestures, events, _) in enumerate(frames):
+                name = f"frames/{i:06d}.jpg"
+                with open(os.path.join(folder, name), "wb") as f:
+                    f.write(jpeg)
+                writer.write_frame(t, detections, extra={
+                    "frame": name,
+                    "gestures": [[mode, action, round(conf, 3)] for mode, action, conf in gestures],
+                    "events": [[mode, action, hand_id] for mode, action, _, hand_id in events],
+                })
+        finally:
+            writer.close()
+
+    def close(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout=1.0)
+            self._thread = None
@@ -0,0 +1,137 @@
+import os
+import sys
+import threading
+import time
+import traceback
+
+# 卡顿时长直方图的分桶上界 (毫秒)，最后一桶为 "以上"
+BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000)
+
+
+def _entry_handler(frame):
+    """
+    找出主线程当前所处的槽函数 / 事件处理函数：
+    事件循环 (app.exec_) 由模块顶层代码调用，调用栈上最外层的非 <module> 帧就是 Qt 进入的 Python 入口
+    """
+    entry = None
+    while frame is not None:
+        if frame.f_code.co_name != "<module>":
+            entry = frame
+        frame = frame.f_back
+    if entry is None:
+        return "未知"
+    code = entry.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{entry.f_lineno}"
+
+
+class GuiWatchdog:
+    """
+    主线程 (GUI) 卡顿检测：
+    主线程里的 QTimer 定时刷新心跳，后台线程发现心跳超过阈值未更新时，
+    通过 sys._current_frames 抓取主线程的 Python 调用栈；卡顿结束后记录时长、调用栈和入口函数，并计入直方图
+    """
+
+    def __init__(self, threshold_ms=250, interval_ms=50, budget_ms=None, log=print):
+        """
+        :param threshold_ms: 心跳间隔超过该值视为卡顿
+        :param interval_ms: 心跳周期
+        :param budget_ms: 响应预算，单次卡顿超过该值计为超预算，None 表示不限制
+        :param log: 日志输出函数
+        """
+        self.threshold = threshold_ms / 1000
+        self.interval_ms = interval_ms
+        self.budget_ms = budget_ms
+        self.log = log
+
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.stall_count = 0
+        self.over_budget = 0
+        self.worst_ms = 0.0
+
+        self._lock = threading.Lock()
+        self._main_ident = None
+        self._last_beat = None
+        self._stall_stack = None
+        self._stall_handler = None
+        self._running = False
+        self._timer = None
+        self._thread = None
+
+    def start(self):
+        """在主线程调用 (QApplication 创建之后)"""
+        from PyQt5.QtCore import QTimer
+
+        self._main_ident = threading.get_ident()
+        self._running = True
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._beat)
+        self._timer.start(self.interval_ms)
+        self._thread = threading.Thread(target=self._watch, name="GuiWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._timer:
+            self._timer.stop()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def _beat(self):
+        now = time.perf_counter()
+        with self._lock:
+            last, self._last_beat = self._last_beat, now
+            stack, handler = self._stall_stack, self._stall_handler
+            self._stall_stack = self._stall_handler = None
+        # 事件循环启动后的第一次心跳只作为起点
+        if last is not None and now - last > self.threshold:
+            self._record((now - last) * 1000, stack, handler)
+
+    def _watch(self):
+        while self._running:
+            time.sleep(self.interval_ms / 1000)
+            with self._lock:
+                last = self._last_beat
+                pending = last is not None and self._stall_stack is None \
+                    and time.perf_counter() - last > self.threshold
+            if not pending:
+                continue
+
+            frame = sys._current_frames().get(self._main_ident)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            handler = _entry_handler(frame)
+            with self._lock:
+                # 期间心跳可能已经恢复，此时调用栈已经不是卡顿现场
+                if self._last_beat != last:
+                    continue
+                self._stall_stack, self._stall_handler = stack, handler
+            self.log(f"[卡顿] 主线程已阻塞 {(time.perf_counter() - last) * 1000:.0f} ms，位于 {handler}")
+
+    def _record(self, duration_ms, stack, handler):
+        bucket = next((i for i, edge in enumerate(BUCKETS_MS) if duration_ms < edge), len(BUCKETS_MS))
+        self.histogram[bucket] += 1
+        self.stall_count += 1
+        self.worst_ms = max(self.worst_ms, duration_ms)
+        over = self.budget_ms is not None and duration_ms > self.budget_ms
+        if over:
+            self.over_budget += 1
+
+        self.log(f"[卡顿] 主线程阻塞 {duration_ms:.0f} ms{' (超出预算)' if over else ''}，"
+                 f"入口: {handler or '未捕获 (卡顿过短)'}")
+        if stack:
+            self.log(stack.rstrip())
+
+    def within_budget(self):
+        return self.over_budget == 0
+
+    def report(self):
+        budget = f"{self.budget_ms} ms" if self.budget_ms is not None else "未设置"
+        self.log(f"主线程卡顿统计 (阈值 {self.threshold * 1000:.0f} ms，预算 {budget})：共 {self.stall_count} 次，"
+                 f"最长 {self.worst_ms:.0f} ms，超出预算 {self.over_budget} 次")
+        lower = 0
+        for i, count in enumerate(self.histogram):
+            label = f"{lower}-{BUCKETS_MS[i]} ms" if i < len(BUCKETS_MS) else f">= {lower} ms"
+            self.log(f"  {label:<14}{count:>6}  {'#' * min(count, 50)}")
+            if i < len(BUCKETS_MS):
+                lower = BUCKETS_MS[i]
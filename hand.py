@@ -2,12 +2,18 @@
 
 import numpy as np
 
+# 凸包参考点 (手腕 + 拇指根部 + 各指根关节)，指尖落在凸包外即视为伸出
+HULL_INDEX = [0, 1, 2, 3, 6, 10, 14, 19, 18, 17]
+FINGER_TIPS = [4, 8, 12, 16, 20]
 
-def get_finger_direction(finger_tip_idx, list_lms, min_vector_length_ratio=0.2):
+
+def get_finger_direction(finger_tip_idx, list_lms, min_vector_length_ratio=0.2, horizontal_half_angle=45):
     """
     计算手指指向的方向
     :param finger_tip_idx: 指尖索引 (通常用 8 代表食指)
     :param list_lms: 关键点列表
+    :param min_vector_length_ratio: 指向向量短于 手腕到中指根距离 x 该比例时不判断方向
+    :param horizontal_half_angle: 左 / 右扇区的半角 (度)，上 / 下扇区为 90 - 该值，默认四个扇区均为 90°
     :return: "Up", "Down", "Left", "Right" or None
     """
     # 指尖到指根映射
@@ -32,22 +38,24 @@ def get_finger_direction(finger_tip_idx, list_lms, min_vector_length_ratio=0.2):
     angle_deg = np.degrees(np.arctan2(-direction_vector[1], direction_vector[0]))
 
     # 判断方向
-    if -45 < angle_deg <= 45:
+    a = horizontal_half_angle
+    if -a < angle_deg <= a:
         return "Right"
-    elif 45 < angle_deg <= 135:
+    elif a < angle_deg <= 180 - a:
         return "Up"
-    elif angle_deg > 135 or angle_deg <= -135:
+    elif angle_deg > 180 - a or angle_deg <= a - 180:
         return "Left"
-    elif -135 < angle_deg <= -45:
+    elif a - 180 < angle_deg <= -a:
         return "Down"
     return None
 
 
-def get_gesture_state(up_fingers, list_lms):
+def get_gesture_state(up_fingers, list_lms, **direction_params):
     """
     核心手势判断逻辑
     :param up_fingers: 伸出的手指索引列表
     :param list_lms: 关键点坐标
+    :param direction_params: 传给 get_finger_direction 的阈值 (min_vector_length_ratio, horizontal_half_angle)
     :return: (模式, 方向/动作)
              模式: "FIST", "PALM", "ONCE", "CONTINUE", "NONE"
              方向: "Up", "Down", "Left", "Right", "Play", "Pause", None
@@ -65,7 +73,7 @@ def get_gesture_state(up_fingers, list_lms):
     # 3. 单指 (食指 8) -> ONCE (单次触发)
     # 条件：只有1根手指，且必须是食指(8)
     if num_fingers == 1 and 8 in up_fingers:
-        direction = get_finger_direction(8, list_lms)
+        direction = get_finger_direction(8, list_lms, **direction_params)
         if direction:
             return "ONCE", direction
 
@@ -73,8 +81,82 @@ def get_gesture_state(up_fingers, list_lms):
     # 条件：2根手指，必须包含食指(8)和中指(12)
     if num_fingers == 2 and 8 in up_fingers and 12 in up_fingers:
         # 双指并拢时，用食指的方向代表整体方向即可
-        direction = get_finger_direction(8, list_lms)
+        direction = get_finger_direction(8, list_lms, **direction_params)
         if direction:
             return "CONTINUE", direction
 
-    return "NONE", None
\ No newline at end of file
+    return "NONE", None
+
+
+def _convex_hull(points):
+    """
+    单调链法求凸包 (逆时针)，与 cv2.convexHull 结果等价
+    :param points: [(x, y), ...] 整数像素坐标
+    :return: 凸包顶点列表
+    """
+    pts = sorted(set(points))
+    if len(pts) <= 2:
+        return pts
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for p in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+
+def _outside_hull(hull, pt):
+    """点严格位于凸包外返回 True (边上视为在内，对应 pointPolygonTest 的 dist >= 0)"""
+    if len(hull) == 1:
+        return tuple(pt) != hull[0]
+    n = len(hull)
+    for i in range(n):
+        a, b = hull[i], hull[(i + 1) % n]
+        if (b[0] - a[0]) * (pt[1] - a[1]) - (b[1] - a[1]) * (pt[0] - a[0]) < 0:
+            return True
+    return False
+
+
+def get_up_fingers(list_lms_pixel, hull_index=HULL_INDEX):
+    """
+    判断伸出的手指：指尖落在手掌凸包之外即视为伸出
+    :param list_lms_pixel: 像素坐标关键点列表 [[x, y], ...]
+    :param hull_index: 构成手掌凸包的关键点索引
+    :return: 伸出的指尖索引列表
+    """
+    hull = _convex_hull([(int(list_lms_pixel[i][0]), int(list_lms_pixel[i][1])) for i in hull_index])
+    return [i for i in FINGER_TIPS
+            if _outside_hull(hull, (int(list_lms_pixel[i][0]), int(list_lms_pixel[i][1])))]
+
+
+def classify_hand(list_lms, w, h, hull_index=HULL_INDEX, **direction_params):
+    """
+    规则引擎入口：由归一化关键点直接得到手势
+    :param list_lms: MediaPipe 归一化关键点 [[x, y, z], ...]
+    :param w: 画面宽度 (像素)
+    :param h: 画面高度 (像素)
+    :param hull_index: 同 get_up_fingers
+    :param direction_params: 同 get_gesture_state，调参见 evaluate.py
+    :return: (模式, 方向/动作)，同 get_gesture_state
+    """
+    list_lms_pixel = [[int(lm[0] * w), int(lm[1] * h)] for lm in list_lms]
+    up_fingers = get_up_fingers(list_lms_pixel, hull_index)
+    return get_gesture_state(up_fingers, list_lms, **direction_params)
+
+
+def classify_hands(lms_list, w, h, **params):
+    """
+    批量接口 (与 LandmarkClassifier.classify_hands 一致)
+    :param params: 同 classify_hand
+    :return: [(模式, 动作, 置信度), ...]，规则引擎置信度恒为 1.0
+    """
+    return [classify_hand(list_lms, w, h, **params) + (1.0,) for list_lms in lms_list]
\ No newline at end of file
@@ -1,134 +1,223 @@
 import sys
-import cv2
-import mediapipe as mp
-import numpy as np
 import time
+import argparse
+import functools
 
 from PyQt5.QtMultimedia import QMediaPlayer
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal, Qt
 from PyQt5.QtGui import QImage, QPixmap
 
 from ui import VideoPlayer
-from hand import get_gesture_state
+from events import EventServer, connect, iter_events
+from gui_watchdog import GuiWatchdog
+from profiles import DEFAULT_PROFILE, get_profile, load_profiles
+from session_state import DEFAULT_STATE_PATH
+
+# 注意：cv2 / mediapipe / numpy 不在模块顶层导入，
+# 由 HandTrackingThread 在后台线程中加载，窗口可以先显示出来
+
+# 手势跳转后多少秒内被反向跳转撤销，视为误触发并自动保存黑匣子
+SEEK_UNDO_WINDOW = 3.0
+# 自动保存的最小间隔 (秒)，避免来回跳转时连续写盘
+FLIGHT_DUMP_COOLDOWN = 10.0
+
+
+def profile_overrides(args):
+    """命令行中覆盖档位的参数，对所有档位生效 (P 键切换后仍然保留)"""
+    return {"capture_fps": args.fps} if args.fps else {}
+
+
+def create_engine(args, listeners=()):
+    """按命令行参数创建 GestureEngine (会导入视觉相关模块，应在后台线程调用)"""
+    from engine import GestureEngine
+    from flight_recorder import FlightRecorder
+
+    classifier = None
+    if args.model:
+        from classifier import LandmarkClassifier
+        classifier = LandmarkClassifier.load(args.model, args.min_confidence)
+    profile = get_profile(args.profile, args.profile_file, **profile_overrides(args))
+    flight_recorder = None
+    if args.flight_seconds > 0:
+        flight_recorder = FlightRecorder(args.flight_seconds, out_dir=args.flight_dir)
+    engine = GestureEngine(args.camera, classifier, args.max_hands, args.record, args.label,
+                           profile=profile, fourcc=args.fourcc, flight_recorder=flight_recorder)
+    engine.tracker.lock_enabled = args.lock_hand
+    for fn in listeners:
+        engine.add_event_listener(fn)
+    return engine
 
 
 class HandTrackingThread(QThread):
+    """在后台线程创建并运行 GestureEngine，把结果转成 Qt 信号"""
     frame_ready = pyqtSignal(QImage)
     gesture_detected = pyqtSignal(str, str)
+    # 预热进度 (加载模块、打开摄像头、初始化模型...)
+    status_changed = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, engine_factory):
+        """
+        :param engine_factory: 无参函数，返回 GestureEngine，在 run() 中调用
+        """
         super().__init__()
-        self._is_running = True
+        self.engine_factory = engine_factory
+        self.engine = None
+        self._stop_requested = False
+        # 引擎就绪前切换的档位，创建引擎后补上
+        self._profile = None
+
+    @property
+    def tracker(self):
+        """引擎就绪前为 None"""
+        return self.engine.tracker if self.engine else None
+
+    def _on_event(self, event):
+        self.gesture_detected.emit(event["mode"], event["action"])
+
+    def _on_frame(self, img, visible):
+        import cv2
+        h, w, _ = img.shape
+        rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        qt_img = QImage(rgb_img.data, w, h, w * 3, QImage.Format_RGB888).copy()
+        self.frame_ready.emit(qt_img)
 
-        self.last_mode = "NONE"
-        self.last_action = None
-        self.last_trigger_time = 0
+    def run(self):
+        self.status_changed.emit("加载手势识别模块...")
+        try:
+            engine = self.engine_factory()
+            engine.add_event_listener(self._on_event)
+            engine.add_frame_listener(self._on_frame)
+            self.engine = engine
+            if self._profile:
+                engine.set_profile(self._profile)
+            if self._stop_requested:
+                engine.stop()
+            engine.run(self.status_changed.emit)
+        except Exception as e:
+            print(f"手势识别启动失败: {e}")
+            self.status_changed.emit(f"手势识别启动失败\n{e}")
+
+    def set_profile(self, profile):
+        """运行中切换性能档位 (见 profiles.py)"""
+        self._profile = profile
+        if self.engine:
+            self.engine.set_profile(profile)
+
+    def dump_flight(self, reason="manual"):
+        """
+        保存黑匣子中最近几秒的现场
+        :return: 输出目录，未启用或还没有画面时返回 None
+        """
+        recorder = self.engine.flight_recorder if self.engine else None
+        return recorder.dump(reason) if recorder else None
 
-        # 连续触发的时间间隔 (秒)，想要1秒4次就将数值改为0.25
-        self.continuous_interval = 0.33
+    def stop(self):
+        self._stop_requested = True
+        if self.engine:
+            self.engine.stop()
+        self.wait()
+        if self.engine and self.engine.flight_recorder:
+            self.engine.flight_recorder.close()
 
-    def run(self):
-        cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 320)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)
 
-        mp_hands = mp.solutions.hands
-        hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.5)
-        mp_draw = mp.solutions.drawing_utils
+class EventSubscriberThread(QThread):
+    """
+    订阅外部手势引擎 (engine.py) 推送的事件，代替本地摄像头
+    连接失败或断开时按指数退避重连 (与 CameraCapture 相同)，播放器可以先于引擎启动，引擎重启后自动恢复
+    """
+    gesture_detected = pyqtSignal(str, str)
+    status_changed = pyqtSignal(str)
+
+    def __init__(self, address, backoff_min=0.2, backoff_max=5.0, connect_timeout=2.0):
+        super().__init__()
+        self.address = address
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.connect_timeout = connect_timeout
+        self._sock = None
+        self._running = True
+
+    def _sleep(self, seconds):
+        """可被 stop() 打断的等待"""
+        end = time.monotonic() + seconds
+        while self._running and time.monotonic() < end:
+            self.msleep(50)
 
-        while self._is_running and cap.isOpened():
-            success, img = cap.read()
-            if not success:
+    def run(self):
+        backoff = self.backoff_min
+        while self._running:
+            try:
+                sock = connect(self.address, timeout=self.connect_timeout)
+            except OSError as e:
+                self.status_changed.emit(f"手势引擎不可用，{backoff:.1f} 秒后重试\n{self.address}")
+                if backoff == self.backoff_min:
+                    print(f"手势引擎连接失败: {e}，将在后台重试")
+                self._sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
                 continue
 
-            img = cv2.flip(img, 1)
-            h, w, _ = img.shape
-            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            results = hands.process(img_rgb)
-
-            current_mode = "NONE"
-            current_action = None
-
-            if results.multi_hand_landmarks:
-                hand = results.multi_hand_landmarks[0]
-                mp_draw.draw_landmarks(img, hand, mp_hands.HAND_CONNECTIONS)
-
-                list_lms_depth = []
-                list_lms_pixel = []
-                for lm in hand.landmark:
-                    list_lms_depth.append([lm.x, lm.y, lm.z])
-                    list_lms_pixel.append([int(lm.x * w), int(lm.y * h)])
-
-                list_lms_np = np.array(list_lms_pixel, dtype=np.int32)
-                hull_index = [0, 1, 2, 3, 6, 10, 14, 19, 18, 17]
-                hull = cv2.convexHull(list_lms_np[hull_index, :])
-
-                up_fingers = []
-                tips = [4, 8, 12, 16, 20]
-                for i in tips:
-                    pt = (int(list_lms_pixel[i][0]), int(list_lms_pixel[i][1]))
-                    dist = cv2.pointPolygonTest(hull, pt, True)
-                    if dist < 0:
-                        up_fingers.append(i)
-
-                current_mode, current_action = get_gesture_state(up_fingers, list_lms_depth)
-
-            # === 核心交互逻辑 ===
-            now = time.time()
-            should_emit = False
-
-            if current_mode != "NONE" and current_action is not None:
-                # 1. 状态改变 -> 立即触发
-                if (current_mode != self.last_mode) or (current_action != self.last_action):
-                    should_emit = True
-                    self.last_trigger_time = now
-
-                # 2. 状态不变且为 CONTINUE 模式 -> 连续触发
-                #    <--- 修改判断条件为 "CONTINUE"
-                elif current_mode == "CONTINUE":
-                    if now - self.last_trigger_time > self.continuous_interval:
-                        should_emit = True
-                        self.last_trigger_time = now
-
-            self.last_mode = current_mode
-            self.last_action = current_action
-
-            if should_emit:
-                self.gesture_detected.emit(current_mode, current_action)
-
-            # === OSD 显示调试信息 (修改部分) ===
-            if current_action:
-                display_text = f"{current_mode}: {current_action}"
-                # 修改点：
-                # 1. 位置 (10, 40) - 稍微下移适应大字体
-                # 2. 字体比例 1.2 - 增大
-                # 3. 颜色 (0, 0, 255) - 红色 (OpenCV是BGR格式)
-                # 4. 线宽 3 - 加粗
-                cv2.putText(img, display_text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX,
-                            1.2, (0, 0, 255), 3)
-
-            rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            qt_img = QImage(rgb_img.data, w, h, w * 3, QImage.Format_RGB888)
-            self.frame_ready.emit(qt_img)
-
-        cap.release()
-        hands.close()
+            sock.settimeout(None)
+            self._sock = sock
+            if not self._running:
+                break
+            backoff = self.backoff_min
+            self.status_changed.emit(f"订阅手势引擎\n{self.address}")
+            try:
+                for event in iter_events(sock):
+                    self.gesture_detected.emit(event["mode"], event["action"])
+            except (OSError, ValueError) as e:
+                print(f"手势引擎连接断开: {e}")
+            self._sock = None
+            sock.close()
+            if self._running:
+                self.status_changed.emit(f"手势引擎连接断开，正在重连...\n{self.address}")
 
     def stop(self):
-        self._is_running = False
+        self._running = False
+        sock = self._sock
+        if sock:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+            sock.close()
         self.wait()
 
 
 class GestureControlledPlayer(VideoPlayer):
-    def __init__(self):
+    def __init__(self, engine_factory=None, connect_address=None, profiles=None, profile_name=DEFAULT_PROFILE):
+        """
+        :param engine_factory: 创建本地 GestureEngine 的函数 (在后台线程调用)
+        :param connect_address: 不使用本地摄像头，改为订阅该地址上的手势引擎
+        两者都为 None 时不启用手势识别
+        :param profiles: 可用的性能档位 (P 键循环切换)
+        :param profile_name: 当前档位
+        """
         super().__init__()
         self.setWindowTitle("手势播放器")
-
-        self.hand_thread = HandTrackingThread()
-        self.hand_thread.frame_ready.connect(self.update_camera_feed)
-        self.hand_thread.gesture_detected.connect(self.handle_gesture_command)
-        self.hand_thread.start()
+        self.profiles = profiles or load_profiles()
+        self.profile_name = profile_name
+        # 最近一次跳转 (时间, 偏移, 是否来自手势) 与最近一次自动保存黑匣子的时间
+        self.last_seek = None
+        self.last_flight_dump = -FLIGHT_DUMP_COOLDOWN
+
+        if connect_address:
+            self.hand_thread = EventSubscriberThread(connect_address)
+            self.hand_thread.status_changed.connect(self.camera_label.setText)
+            self.camera_label.setText(f"订阅手势引擎\n{connect_address}")
+        elif engine_factory:
+            self.hand_thread = HandTrackingThread(engine_factory)
+            self.hand_thread.frame_ready.connect(self.update_camera_feed)
+            self.hand_thread.status_changed.connect(self.camera_label.setText)
+        else:
+            self.hand_thread = None
+            self.camera_label.setText("手势识别已关闭")
+
+        if self.hand_thread:
+            self.hand_thread.gesture_detected.connect(self.handle_gesture_command)
+            # 等事件循环启动、窗口显示之后再开始加载视觉模块
+            QTimer.singleShot(0, self.hand_thread.start)
 
     def update_camera_feed(self, q_image):
         pixmap = QPixmap.fromImage(q_image)
@@ -138,7 +227,7 @@ class GestureControlledPlayer(VideoPlayer):
     def handle_gesture_command(self, mode, action):
         """
         处理手势指令
-        mode: ONCE, CONTINUE, FIST, PALM
+        mode: ONCE, CONTINUE, FIST, PALM, ZOOM (双手)
         """
         print(f"执行指令: [{mode}] {action}")
 
@@ -170,20 +259,141 @@ class GestureControlledPlayer(VideoPlayer):
                 self.video_widget.show_osd(icon, f"{prefix}{vol}%")
 
             elif action == "Right":
-                self.seek_relative(5000)
+                self.seek_relative(5000, from_gesture=True)
                 self.video_widget.show_osd("⏩", f"{prefix}+5s")
 
             elif action == "Left":
-                self.seek_relative(-5000)
+                self.seek_relative(-5000, from_gesture=True)
                 self.video_widget.show_osd("⏪", f"{prefix}-5s")
 
+        # 双手缩放：调整倍速
+        elif mode == "ZOOM":
+            speed = self.step_playback_speed(1 if action == "In" else -1)
+            self.video_widget.show_osd("🚀", f"{speed}x")
+
+    def keyPressEvent(self, event):
+        # L键：开启/关闭控制手锁定
+        tracker = self.hand_thread.tracker if isinstance(self.hand_thread, HandTrackingThread) else None
+        if event.key() == Qt.Key_L and tracker:
+            tracker.lock_enabled = not tracker.lock_enabled
+            tracker.lock_id = None
+            self.video_widget.show_osd("🔒" if tracker.lock_enabled else "🔓",
+                                       "锁定控制手" if tracker.lock_enabled else "解除锁定")
+        # P键：循环切换性能档位，无需重启
+        elif event.key() == Qt.Key_P and isinstance(self.hand_thread, HandTrackingThread):
+            names = list(self.profiles)
+            index = names.index(self.profile_name) if self.profile_name in names else -1
+            self.profile_name = names[(index + 1) % len(names)]
+            self.hand_thread.set_profile(self.profiles[self.profile_name])
+            self.video_widget.show_osd("⚙", self.profile_name)
+        # F8键：保存黑匣子 (最近几秒的画面、关键点与分类结果)
+        elif event.key() == Qt.Key_F8:
+            self.dump_flight_recorder("manual")
+        else:
+            super().keyPressEvent(event)
+
+    def seek_relative(self, delta_ms, from_gesture=False):
+        super().seek_relative(delta_ms)
+        now = time.monotonic()
+        last, self.last_seek = self.last_seek, (now, delta_ms, from_gesture)
+        # 手势跳转很快被反向跳转撤销：多半是误识别，自动保存现场
+        if (last and last[2] and last[1] == -delta_ms and now - last[0] <= SEEK_UNDO_WINDOW
+                and now - self.last_flight_dump >= FLIGHT_DUMP_COOLDOWN):
+            self.last_flight_dump = now
+            self.dump_flight_recorder("seek-undo")
+
+    def dump_flight_recorder(self, reason):
+        if not isinstance(self.hand_thread, HandTrackingThread):
+            return
+        path = self.hand_thread.dump_flight(reason)
+        if path:
+            print(f"黑匣子已保存: {path}")
+            self.video_widget.show_osd("💾", "已保存现场")
+
     def closeEvent(self, event):
-        self.hand_thread.stop()
+        if self.hand_thread:
+            self.hand_thread.stop()
         super().closeEvent(event)
 
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="手势播放器")
+    parser.add_argument("--camera", default="0", help="摄像头编号、设备路径 (/dev/video0)、流地址或视频文件路径")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE,
+                        help="性能档位: low-power / balanced / low-latency 或自定义 (运行中按 P 切换)")
+    parser.add_argument("--profile-file", help="自定义档位 JSON 文件")
+    parser.add_argument("--fps", type=float, help="请求的采集帧率 (覆盖档位设置)")
+    parser.add_argument("--fourcc", help="采集像素格式，如 MJPG、YUYV")
+    parser.add_argument("--model", help="使用训练好的关键点分类器 (classifier.py train 生成) 代替规则引擎")
+    parser.add_argument("--min-confidence", type=float, default=0.5, help="分类器最低置信度")
+    parser.add_argument("--record", metavar="PATH", help="把手部关键点录制到 PATH (.jsonl)")
+    parser.add_argument("--label", help="录制时整段的标注，例如 FIST:Pause、ONCE:Up、NONE")
+    parser.add_argument("--max-hands", type=int, default=2, help="同时跟踪的最大手数")
+    parser.add_argument("--lock-hand", action="store_true", help="只允许第一只做出手势的手控制播放")
+    parser.add_argument("--publish", metavar="ADDR", help="同时把手势事件推送到 ADDR (tcp:HOST:PORT 或 unix:PATH)")
+    parser.add_argument("--connect", metavar="ADDR", help="不打开摄像头，订阅 ADDR 上的手势引擎 (engine.py)")
+    parser.add_argument("--stall-threshold", type=int, default=250, metavar="MS",
+                        help="主线程阻塞超过 MS 毫秒时记录调用栈，0 表示关闭卡顿检测")
+    parser.add_argument("--stall-budget", type=int, metavar="MS",
+                        help="响应预算：任意一次卡顿超过 MS 毫秒则退出码为 1")
+    parser.add_argument("--sample-profile", nargs="?", const="", metavar="PATH",
+                        help="启动即开始采样剖析，退出 (或按 F9) 时写出 collapsed stack 文件")
+    parser.add_argument("--no-gesture", action="store_true", help="只作为普通播放器使用，不加载任何视觉模块")
+    parser.add_argument("--session-file", default=DEFAULT_STATE_PATH, metavar="PATH",
+                        help="播放状态快照文件 (退出时保存，启动时恢复)")
+    parser.add_argument("--no-session", action="store_true", help="不恢复也不保存播放状态")
+    parser.add_argument("--flight-seconds", type=float, default=10.0, metavar="SEC",
+                        help="黑匣子保留最近 SEC 秒的画面 (F8 或撤销手势跳转时保存)，0 表示关闭")
+    parser.add_argument("--flight-dir", default="flights", help="黑匣子的保存目录")
+    # 未识别的参数留给 Qt
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+
+def create_player(args):
+    """
+    :return: (player, server)，server 为 --publish 创建的 EventServer
+    """
+    server = None
+    engine_factory = None
+    if not args.no_gesture and not args.connect:
+        listeners = []
+        if args.publish:
+            server = EventServer(args.publish)
+            try:
+                server.start()
+            except OSError as e:
+                raise SystemExit(f"无法监听 {args.publish}: {e}")
+            listeners.append(server.publish)
+        engine_factory = functools.partial(create_engine, args, listeners)
+    profiles = load_profiles(args.profile_file, **profile_overrides(args))
+    player = GestureControlledPlayer(engine_factory, args.connect, profiles, args.profile)
+    # 恢复在事件循环开始后进行，此处设置的路径会生效
+    player.state_path = None if args.no_session else args.session_file
+    return player, server
+
+
 if __name__ == '__main__':
+    args = parse_args(sys.argv)
     app = QApplication(sys.argv)
-    player = GestureControlledPlayer()
+    player, server = create_player(args)
     player.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    if args.sample_profile is not None:
+        player.profile_path = args.sample_profile or None
+        player.toggle_profiler()
+
+    watchdog = None
+    if args.stall_threshold > 0:
+        watchdog = GuiWatchdog(args.stall_threshold, budget_ms=args.stall_budget)
+        watchdog.start()
+
+    code = app.exec_()
+    if server:
+        server.close()
+    if watchdog:
+        watchdog.stop()
+        if watchdog.stall_count or args.stall_budget is not None:
+            watchdog.report()
+        if not watchdog.within_budget() and code == 0:
+            code = 1
+    sys.exit(code)
\ No newline at end of file
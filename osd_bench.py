@@ -0,0 +1,107 @@
+import argparse
+import sys
+import time
+
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel
+from PyQt5.QtCore import Qt, QTimer
+
+from ui import OSDWidget
+
+
+class LabelOSDWidget(QWidget):
+    """改造前的 OSD 实现 (两个 QLabel + 样式表)，仅用于对比测试"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(160, 100)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.hide()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(5)
+
+        self.setStyleSheet("""
+            QWidget {
+                background-color: rgba(0, 0, 0, 180);
+                border-radius: 12px;
+            }
+            QLabel {
+                color: white;
+                background-color: transparent;
+                font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
+                font-weight: bold;
+            }
+        """)
+
+        self.icon_label = QLabel()
+        self.icon_label.setAlignment(Qt.AlignCenter)
+        self.icon_label.setStyleSheet("font-size: 40px;")
+        layout.addWidget(self.icon_label)
+
+        self.text_label = QLabel()
+        self.text_label.setAlignment(Qt.AlignCenter)
+        self.text_label.setStyleSheet("font-size: 20px;")
+        layout.addWidget(self.text_label)
+
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.timeout.connect(self.hide)
+
+    def show_message(self, icon_text, message, duration=600):
+        self.icon_label.setText(icon_text)
+        self.text_label.setText(message)
+        self.show()
+        self.raise_()
+        self.hide_timer.start(duration)
+
+
+def held_key_messages(count):
+    """模拟长按上/下键：音量在 0~100 之间来回变化，图标随之切换"""
+    vol, step = 50, 5
+    for _ in range(count):
+        vol += step
+        if vol >= 100 or vol <= 0:
+            step = -step
+        icon = "🔊" if step > 0 else ("🔉" if vol > 0 else "🔇")
+        yield icon, f"{vol}%"
+
+
+def measure(app, osd_cls, count):
+    host = QWidget()
+    host.resize(800, 450)
+    host.setStyleSheet("background-color: black;")
+    osd = osd_cls(host)
+    osd.move((host.width() - osd.width()) // 2, (host.height() - osd.height()) // 2)
+    host.show()
+    app.processEvents()
+
+    timings = []
+    for icon, text in held_key_messages(count):
+        start = time.perf_counter()
+        osd.show_message(icon, text)
+        # 同步重绘，计入样式计算、排版与绘制的全部开销
+        osd.repaint()
+        app.processEvents()
+        timings.append(time.perf_counter() - start)
+    host.close()
+
+    timings.sort()
+    return (sum(timings) / len(timings) * 1000,
+            timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSD 每次更新的耗时：改造前 (QLabel + 样式表) vs 预渲染缓存")
+    parser.add_argument("--count", type=int, default=500, help="模拟长按产生的更新次数")
+    args, _ = parser.parse_known_args()
+
+    app = QApplication(sys.argv)
+    print(f"{'实现':<22}{'平均 ms':>10}{'p95 ms':>10}")
+    for name, cls in (("QLabel + 样式表 (旧)", LabelOSDWidget), ("预渲染缓存 (新)", OSDWidget)):
+        mean, p95 = measure(app, cls, args.count)
+        print(f"{name:<22}{mean:>10.3f}{p95:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
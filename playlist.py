@@ -0,0 +1,65 @@
+import bisect
+
+
+def apply_changes(playlist, files, current_index, missing_path=None):
+    """
+    对比目录与播放列表，只对变化的文件做插入 / 删除 (保持排序)，当前序号随之平移
+    正在播放的文件被删除时 current_index 变为 -1，并记录其路径 (missing_path)；该文件又放回来时恢复选中
+    :param playlist: 已排序的播放列表，原地修改
+    :param files: 目录中现有的文件
+    :return: (ops, current_index, missing_path)
+             ops: 按顺序执行即可同步界面列表的操作 [("remove", 序号) / ("insert", 序号, 路径), ...]
+    """
+    files = set(files)
+    current = set(playlist)
+    ops = []
+
+    for file_path in sorted(current - files):
+        index = bisect.bisect_left(playlist, file_path)
+        del playlist[index]
+        ops.append(("remove", index))
+        if index < current_index:
+            current_index -= 1
+        elif index == current_index:
+            current_index = -1
+            missing_path = file_path
+
+    for file_path in sorted(files - current):
+        index = bisect.bisect_left(playlist, file_path)
+        playlist.insert(index, file_path)
+        ops.append(("insert", index, file_path))
+        if file_path == missing_path:
+            current_index = index
+            missing_path = None
+        elif index <= current_index:
+            current_index += 1
+
+    return ops, current_index, missing_path
+
+
+def missing_position(playlist, missing_path):
+    """被删除的当前文件原来的位置，即排在它后面的文件的序号 (可能等于列表长度)"""
+    return bisect.bisect_left(playlist, missing_path)
+
+
+def step_index(playlist, current_index, missing_path, step):
+    """
+    上一部 / 下一部的序号；当前文件已删除时按它原来的位置计算
+    :param step: -1 上一部，+1 下一部
+    :return: 序号，列表为空时为 -1
+    """
+    if not playlist:
+        return -1
+    if missing_path is not None:
+        position = missing_position(playlist, missing_path)
+        return (position - 1 if step < 0 else position) % len(playlist)
+    if current_index == -1:
+        return 0
+    return (current_index + step) % len(playlist)
+
+
+def resume_index(playlist, current_index, missing_path):
+    """保存 / 恢复播放状态时的序号：当前文件已删除时为排在它后面的文件 (已是末尾则为最后一个)"""
+    if missing_path is not None:
+        return min(missing_position(playlist, missing_path), len(playlist) - 1)
+    return current_index
@@ -0,0 +1,159 @@
+import argparse
+import functools
+import json
+import time
+
+# 内置性能档位
+# target_cpu: 目标占用 (单核百分比)，target_latency_ms: 目标 采集 -> 判定 延迟
+# 这两项只是设计目标的占位值，尚未实测；应以 `python profiles.py bench` 在目标机器上的结果替换
+PROFILES = {
+    # 无风扇 / 低功耗设备：小模型、低帧率、预览降频
+    "low-power": {
+        "width": 320,
+        "height": 240,
+        "capture_fps": 15,
+        "model_complexity": 0,
+        "min_detection_confidence": 0.7,
+        "min_tracking_confidence": 0.5,
+        "inference_fps": 10,
+        "preview_fps": 5,
+        "continuous_interval": 0.4,
+        "target_cpu": 20,
+        "target_latency_ms": 150,
+    },
+    # 默认：与原先的参数一致，只是限制了推理和预览帧率
+    "balanced": {
+        "width": 320,
+        "height": 240,
+        "capture_fps": 30,
+        "model_complexity": 1,
+        "min_detection_confidence": 0.7,
+        "min_tracking_confidence": 0.5,
+        "inference_fps": 30,
+        "preview_fps": 15,
+        "continuous_interval": 0.33,
+        "target_cpu": 45,
+        "target_latency_ms": 80,
+    },
+    # 台式机：小模型 + 不限推理帧率，换取最低延迟
+    "low-latency": {
+        "width": 320,
+        "height": 240,
+        "capture_fps": 60,
+        "model_complexity": 0,
+        "min_detection_confidence": 0.6,
+        "min_tracking_confidence": 0.5,
+        "inference_fps": None,
+        "preview_fps": 30,
+        "continuous_interval": 0.25,
+        "target_cpu": 70,
+        "target_latency_ms": 40,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def load_profiles(path=None, **overrides):
+    """
+    读取档位配置
+    :param path: JSON 文件 {"档位名": {参数...}}，同名档位覆盖内置参数，新名字按 balanced 补齐缺省项
+    :param overrides: 应用到所有档位的参数 (如命令行的 --fps)，切换档位后仍然有效
+    :return: {档位名: 参数 dict}
+    """
+    profiles = {name: dict(p, name=name) for name, p in PROFILES.items()}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            custom = json.load(f)
+        for name, custom_overrides in custom.items():
+            base = profiles.get(name, profiles[DEFAULT_PROFILE])
+            profiles[name] = dict(base, **custom_overrides, name=name)
+    if overrides:
+        profiles = {name: dict(p, **overrides) for name, p in profiles.items()}
+    return profiles
+
+
+def get_profile(name=None, path=None, **overrides):
+    profiles = load_profiles(path, **overrides)
+    name = name or DEFAULT_PROFILE
+    if name not in profiles:
+        raise ValueError(f"未知的性能档位: {name} (可选: {', '.join(profiles)})")
+    return profiles[name]
+
+
+def benchmark(profile, source, seconds):
+    """
+    用给定画面源运行无界面引擎，统计 CPU 占用、帧率与 采集 -> 判定 延迟
+    :return: {"cpu": 单核百分比, "fps": 推理帧率, "latency_ms": 平均延迟, "latency_p95_ms": 95 分位延迟}
+    """
+    import threading
+    from engine import GestureEngine
+
+    engine = GestureEngine(source, profile=profile)
+    # 模拟界面预览，使绘制开销计入统计
+    engine.add_frame_listener(lambda img, visible: None)
+    engine.warm_up()
+
+    timer = threading.Timer(seconds, engine.stop)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    timer.start()
+    engine.run()
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    timer.cancel()
+
+    latencies = sorted(engine.latencies)
+    if not latencies:
+        return {"cpu": cpu / wall * 100, "fps": 0.0, "latency_ms": 0.0, "latency_p95_ms": 0.0}
+    return {
+        "cpu": cpu / wall * 100,
+        "fps": engine.frames_processed / wall,
+        "latency_ms": sum(latencies) / len(latencies) * 1000,
+        "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+    }
+
+
+def cmd_list(args):
+    for name, p in load_profiles(args.config).items():
+        fps = p["inference_fps"] or "不限"
+        print(f"{name:<14}{p['width']}x{p['height']}  模型 {p['model_complexity']}  推理 {fps} fps  "
+              f"预览 {p['preview_fps']} fps  目标 CPU {p['target_cpu']}%  延迟 {p['target_latency_ms']} ms (未实测)")
+
+
+def cmd_bench(args):
+    profiles = load_profiles(args.config)
+    names = args.profile or list(profiles)
+
+    # "目标" 列为档位中未实测的占位值，仅供对照
+    print(f"{'档位':<14}{'CPU %':>8}{'目标':>8}{'fps':>8}{'延迟 ms':>10}{'p95 ms':>10}{'目标':>8}")
+    for name in names:
+        p = profiles[name]
+        if args.source == "synthetic":
+            from capture import SyntheticSource
+            source = functools.partial(SyntheticSource, p["width"], p["height"], p["capture_fps"] or 30)
+        else:
+            source = args.source
+        r = benchmark(p, source, args.seconds)
+        print(f"{name:<14}{r['cpu']:>8.1f}{p['target_cpu']:>8}{r['fps']:>8.1f}"
+              f"{r['latency_ms']:>10.1f}{r['latency_p95_ms']:>10.1f}{p['target_latency_ms']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="性能档位：查看与实测")
+    parser.add_argument("--config", help="自定义档位 JSON 文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="列出所有档位")
+    p_list.set_defaults(func=cmd_list)
+
+    p_bench = sub.add_parser("bench", help="实测各档位的 CPU 占用与延迟")
+    p_bench.add_argument("--profile", action="append", help="只测指定档位 (可重复)")
+    p_bench.add_argument("--source", default="0", help="摄像头编号、视频文件，或 synthetic (合成画面)")
+    p_bench.add_argument("--seconds", type=float, default=15.0, help="每个档位的测试时长")
+    p_bench.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
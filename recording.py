@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+# 录制文件格式版本，格式变更时递增
+SESSION_VERSION = 1
+SESSION_EXT = ".jsonl"
+
+
+class SessionWriter:
+    """
+    手部关键点录制 (JSON Lines)
+    第一行为文件头: {"version", "width", "height", "label", "created"}
+    之后每行一帧: {"t": 时间戳, "hands": [{"lms": [[x, y, z], ...], "handedness": "Right", "score": 0.98}],
+                  "label": "模式:动作" (可选，缺省沿用文件头的 label), 其他附加字段 (可选)}
+    """
+
+    def __init__(self, path, width, height, label=None):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._write({
+            "version": SESSION_VERSION,
+            "width": width,
+            "height": height,
+            "label": label,
+            "created": time.time(),
+        })
+
+    def _write(self, obj):
+        self._file.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+
+    def write_frame(self, t, hands, label=None, extra=None):
+        """
+        :param t: 帧时间戳 (秒)
+        :param hands: [{"lms": [[x, y, z], ...], "handedness": str, "score": float}, ...]
+        :param label: 该帧的标注，None 表示沿用文件头
+        :param extra: 附加字段 dict (如 flight_recorder 保存的画面文件名和分类结果)，读取时原样保留
+        """
+        frame = {
+            "t": round(t, 4),
+            "hands": [{
+                "lms": [[round(v, 5) for v in lm] for lm in hand["lms"]],
+                "handedness": hand.get("handedness"),
+                "score": round(hand.get("score", 1.0), 3),
+            } for hand in hands],
+        }
+        if label is not None:
+            frame["label"] = label
+        if extra:
+            frame.update(extra)
+        self._write(frame)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def load_session(path):
+    """
+    读取录制文件
+    :return: (header, frames)，每帧的 "label" 已按文件头补齐
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != SESSION_VERSION:
+            raise ValueError(f"不支持的录制格式版本: {header.get('version')} ({path})")
+        frames = []
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            frame = json.loads(line)
+            frame.setdefault("label", header.get("label"))
+            frames.append(frame)
+    return header, frames
+
+
+def iter_session_paths(paths):
+    """展开文件/目录参数，返回排序后的录制文件列表"""
+    result = []
+    for p in paths:
+        if os.path.isdir(p):
+            for name in sorted(os.listdir(p)):
+                if name.endswith(SESSION_EXT):
+                    result.append(os.path.join(p, name))
+        else:
+            result.append(p)
+    return result
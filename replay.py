@@ -0,0 +1,359 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import playlist
+from hand import classify_hands
+from profiles import get_profile
+from recording import SessionWriter, iter_session_paths, load_session
+from tracker import HandTracker
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+SESSIONS_DIR = os.path.join(GOLDEN_DIR, "sessions")
+EVENTS_DIR = os.path.join(GOLDEN_DIR, "events")
+BUDGET_PATH = os.path.join(GOLDEN_DIR, "budget.json")
+PLAYLIST_PATH = os.path.join(GOLDEN_DIR, "playlist.json")
+
+# 更新预算时在实测值基础上留出的余量 (不同机器性能不同)
+BUDGET_HEADROOM = 4.0
+
+
+# === 1. 回放 ===
+def replay_session(path, classifier=None):
+    """
+    把录制的关键点按帧送入完整的 分类 -> 触发 流程，时钟使用录制时间戳 (模拟单调时钟)，结果可复现
+    :return: (events, classify_times)
+             events: [{"t": 相对时间, "mode", "action", "hand"}, ...]
+             classify_times: 每帧分类耗时 (秒)
+    """
+    header, frames = load_session(path)
+    w, h = header["width"], header["height"]
+    tracker = HandTracker(get_profile()["continuous_interval"])
+    classify = classifier.classify_hands if classifier is not None else classify_hands
+
+    events = []
+    classify_times = []
+    t0 = frames[0]["t"] if frames else 0.0
+    for frame in frames:
+        now = frame["t"] - t0
+        lms_list = [hand["lms"] for hand in frame["hands"]]
+        start = time.perf_counter()
+        gestures = classify(lms_list, w, h)
+        classify_times.append(time.perf_counter() - start)
+
+        _, emitted = tracker.update(frame["hands"], gestures, now)
+        for mode, action, _, hand_id in emitted:
+            events.append({"t": round(now, 3), "mode": mode, "action": action, "hand": hand_id})
+    return events, classify_times
+
+
+def golden_path(session_path):
+    name = os.path.splitext(os.path.basename(session_path))[0]
+    return os.path.join(EVENTS_DIR, f"{name}.json")
+
+
+def measure_classify_us(paths, repeat=5):
+    """所有会话逐帧分类耗时的中位数 (微秒)，取多轮最小值以降低抖动"""
+    best = None
+    for _ in range(repeat):
+        times = []
+        for path in paths:
+            times.extend(replay_session(path)[1])
+        times.sort()
+        median = times[len(times) // 2] * 1e6
+        best = median if best is None else min(best, median)
+    return best
+
+
+# === 2. 合成测试数据 ===
+# 手的局部坐标：手腕为原点，y 轴向下，单位约为掌长
+_MCP = {5: (-0.35, -1.0), 9: (-0.1, -1.05), 13: (0.15, -1.0), 17: (0.38, -0.9)}
+_DIRECTIONS = {"Up": (0.0, -1.0), "Down": (0.0, 1.0), "Left": (-1.0, 0.0), "Right": (1.0, 0.0)}
+
+
+def synthetic_hand(extended, direction="Up", thumb=False, center=(0.5, 0.6), scale=0.12, aspect=4 / 3,
+                   angle=0.0):
+    """
+    生成一只手的 21 个归一化关键点
+    :param extended: 伸直的手指 (MCP 索引 5 / 9 / 13 / 17)
+    :param direction: 伸直的手指指向
+    :param thumb: 拇指是否张开
+    :param aspect: 画面宽高比，保证像素空间里手的形状不变形
+    :param angle: 整只手绕手腕旋转的角度 (度)，用于模拟手的倾斜
+    """
+    pts = [(0.0, 0.0)] * 21
+    pts[1] = (-0.35, -0.25)
+    if thumb:
+        pts[2], pts[3], pts[4] = (-0.6, -0.45), (-0.8, -0.65), (-1.0, -0.85)
+    else:
+        pts[2], pts[3], pts[4] = (-0.5, -0.45), (-0.45, -0.65), (-0.2, -0.75)
+
+    dx, dy = _DIRECTIONS[direction]
+    for mcp, (mx, my) in _MCP.items():
+        pts[mcp] = (mx, my)
+        if mcp in extended:
+            pts[mcp + 1] = (mx + 0.45 * dx, my + 0.45 * dy)
+            pts[mcp + 2] = (mx + 0.75 * dx, my + 0.75 * dy)
+            pts[mcp + 3] = (mx + 1.0 * dx, my + 1.0 * dy)
+        else:
+            pts[mcp + 1] = (mx, my - 0.35)
+            pts[mcp + 2] = (mx, my - 0.15)
+            # 指尖向掌心收拢，避免与 MCP / PIP 共线落在凸包边上
+            pts[mcp + 3] = (mx * 0.7, my + 0.15)
+
+    rad = math.radians(angle)
+    cos_a, sin_a = math.cos(rad), math.sin(rad)
+    cx, cy = center
+    return [[round(cx + (x * cos_a - y * sin_a) * scale, 5),
+             round(cy + (x * sin_a + y * cos_a) * scale * aspect, 5),
+             0.0] for x, y in pts]
+
+
+# 姿态 -> (伸直的手指, 拇指, 预期标签)
+POSES = {
+    "fist": ((), False, "FIST:Pause"),
+    "palm": ((5, 9, 13, 17), True, "PALM:Play"),
+    "point": ((5,), False, "ONCE:{}"),
+    "two": ((5, 9), False, "CONTINUE:{}"),
+    # 只张开拇指：画面中有手但不构成手势
+    "thumb": ((), True, "NONE"),
+}
+
+
+def pose_hand(pose, direction="Up", **kwargs):
+    extended, thumb, label = POSES[pose]
+    return synthetic_hand(extended, direction, thumb, **kwargs), label.format(direction)
+
+
+# 每段: (时长 秒, [(姿态, 方向, 中心点), ...])，空列表表示画面中没有手
+FIXTURES = {
+    "single_hand_basic": [
+        (0.5, []),
+        (1.0, [("palm", "Up", (0.5, 0.6))]),
+        (0.5, []),
+        (1.0, [("fist", "Up", (0.5, 0.6))]),
+        (0.8, [("point", "Up", (0.5, 0.6))]),
+        (0.8, [("point", "Down", (0.5, 0.4))]),
+        (0.8, [("point", "Left", (0.6, 0.6))]),
+        (0.8, [("point", "Right", (0.4, 0.6))]),
+        (0.5, []),
+    ],
+    "continuous_seek": [
+        (0.3, []),
+        (2.0, [("two", "Right", (0.4, 0.6))]),
+        (0.3, [("fist", "Up", (0.4, 0.6))]),
+        (1.5, [("two", "Left", (0.6, 0.6))]),
+        (0.3, []),
+        (1.0, [("two", "Up", (0.5, 0.6))]),
+    ],
+    "two_hands": [
+        (0.5, [("palm", "Up", (0.3, 0.6)), ("fist", "Up", (0.7, 0.6))]),
+        (0.5, [("fist", "Up", (0.3, 0.6)), ("fist", "Up", (0.7, 0.6))]),
+        (0.5, [("point", "Up", (0.3, 0.6))]),
+        (0.5, []),
+    ],
+}
+
+
+def _zoom_frames(fps, aspect, lead=0.0):
+    """
+    两只手伸出食指，两指先拉开再靠拢
+    :param lead: 左手先伸出食指的秒数，期间右手在画面中但没有手势
+    """
+    left, _ = pose_hand("point", "Right", center=(0.3, 0.6), aspect=aspect)
+    right, _ = pose_hand("thumb", center=(0.7, 0.6), aspect=aspect)
+    frames = [[(left, "ONCE:Right", "Left"), (right, "NONE", "Right")] for _ in range(int(lead * fps))]
+    steps = int(2.0 * fps)
+    for i in range(steps):
+        phase = i / steps
+        sep = 0.2 + 0.15 * (phase * 2 if phase < 0.5 else (1 - phase) * 2)
+        left, _ = pose_hand("point", "Right", center=(0.5 - sep, 0.6), aspect=aspect)
+        right, _ = pose_hand("point", "Left", center=(0.5 + sep, 0.6), aspect=aspect)
+        frames.append([(left, "ONCE:Right", "Left"), (right, "ONCE:Left", "Right")])
+    return frames
+
+
+def make_fixtures(out_dir=SESSIONS_DIR, fps=30, width=320, height=240):
+    """生成合成会话，每帧的 label 为预期手势 (第一只手)"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    zoom_fixtures = [("two_hand_zoom", 0.0), ("two_hand_zoom_staggered", 0.4)]
+    for name, segments in list(FIXTURES.items()) + zoom_fixtures:
+        if not isinstance(segments, list):
+            frame_hands = _zoom_frames(fps, width / height, lead=segments)
+        else:
+            frame_hands = []
+            for duration, hands in segments:
+                for _ in range(int(duration * fps)):
+                    # 手轻微晃动，接近真实录制
+                    angle = 8 * math.sin(len(frame_hands) * 0.3)
+                    frame_hands.append([
+                        pose_hand(pose, direction, center=center, aspect=width / height, angle=angle)
+                        + ("Left" if i == 0 else "Right",)
+                        for i, (pose, direction, center) in enumerate(hands)])
+
+        path = os.path.join(out_dir, f"{name}.jsonl")
+        writer = SessionWriter(path, width, height)
+        for i, hands in enumerate(frame_hands):
+            writer.write_frame(i / fps,
+                               [{"lms": lms, "handedness": handedness, "score": 1.0}
+                                for lms, _, handedness in hands],
+                               label=hands[0][1] if hands else "NONE")
+        writer.close()
+        paths.append(path)
+    return paths
+
+
+# === 3. 播放列表增量更新 ===
+def replay_playlist(scenario):
+    """
+    按步骤把目录内容送入 playlist.apply_changes，同时按返回的操作同步一份 "界面列表"
+    :param scenario: {"playlist", "current", "steps": [{"files", ...预期}, ...]}
+    :return: 每一步的结果 [{"files", "playlist", "current", "missing", "prev", "next", "resume"}, ...]
+    """
+    items = list(scenario["playlist"])
+    widget = list(items)
+    current, missing = scenario["current"], None
+    results = []
+    for step in scenario["steps"]:
+        ops, current, missing = playlist.apply_changes(items, step["files"], current, missing)
+        for op in ops:
+            if op[0] == "remove":
+                del widget[op[1]]
+            else:
+                widget.insert(op[1], op[2])
+        if widget != items:
+            raise AssertionError(f"界面列表与播放列表不一致: {widget} != {items}")
+        results.append({
+            "files": step["files"],
+            "playlist": list(items),
+            "current": current,
+            "missing": missing,
+            "prev": playlist.step_index(items, current, missing, -1),
+            "next": playlist.step_index(items, current, missing, 1),
+            "resume": playlist.resume_index(items, current, missing),
+        })
+    return results
+
+
+def check_playlist(path=PLAYLIST_PATH):
+    """:return: 是否全部通过"""
+    with open(path, "r", encoding="utf-8") as f:
+        scenarios = json.load(f)
+    ok = True
+    for scenario in scenarios:
+        try:
+            results = replay_playlist(scenario)
+        except AssertionError as e:
+            print(f"[失败] 播放列表 {scenario['name']}: {e}")
+            ok = False
+            continue
+        index = next((i for i, (a, b) in enumerate(zip(results, scenario["steps"])) if a != b), None)
+        if index is None:
+            print(f"[通过] 播放列表 {scenario['name']}: {len(results)} 步")
+            continue
+        ok = False
+        print(f"[失败] 播放列表 {scenario['name']}: 第 {index} 步不一致")
+        print(f"    基准: {scenario['steps'][index]}")
+        print(f"    实际: {results[index]}")
+    return ok
+
+
+# === 4. 命令行 ===
+def cmd_check(args):
+    paths = iter_session_paths(args.sessions or [SESSIONS_DIR])
+    failed = False
+
+    for path in paths:
+        events, _ = replay_session(path)
+        gpath = golden_path(path)
+        if not os.path.exists(gpath):
+            print(f"[缺少] {os.path.basename(path)}: 没有基准文件 {gpath}")
+            failed = True
+            continue
+        with open(gpath, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        if events == expected:
+            print(f"[通过] {os.path.basename(path)}: {len(events)} 个事件")
+            continue
+        failed = True
+        index = next((i for i, (a, b) in enumerate(zip(events, expected)) if a != b),
+                     min(len(events), len(expected)))
+        print(f"[失败] {os.path.basename(path)}: 第 {index} 个事件不一致 (实际 {len(events)} 个，基准 {len(expected)} 个)")
+        print(f"    基准: {expected[index] if index < len(expected) else '无'}")
+        print(f"    实际: {events[index] if index < len(events) else '无'}")
+
+    # 播放列表的预期结果是手写的 (不由 update 生成)，只在默认检查时运行
+    if not args.sessions and not check_playlist():
+        failed = True
+
+    with open(BUDGET_PATH, "r", encoding="utf-8") as f:
+        budget = json.load(f)["classify_us_per_frame"]
+    measured = measure_classify_us(paths)
+    if measured > budget:
+        failed = True
+        print(f"[失败] 每帧分类耗时 {measured:.1f} us，超出预算 {budget:.1f} us")
+    else:
+        print(f"[通过] 每帧分类耗时 {measured:.1f} us (预算 {budget:.1f} us)")
+
+    sys.exit(1 if failed else 0)
+
+
+def cmd_update(args):
+    paths = iter_session_paths(args.sessions or [SESSIONS_DIR])
+    os.makedirs(EVENTS_DIR, exist_ok=True)
+    for path in paths:
+        events, _ = replay_session(path)
+        # 每行一个事件，基准变化时 diff 一目了然
+        with open(golden_path(path), "w", encoding="utf-8") as f:
+            f.write("[\n" + ",\n".join(json.dumps(e, ensure_ascii=False) for e in events) + "\n]\n")
+        print(f"已更新基准: {os.path.basename(path)} ({len(events)} 个事件)")
+    if args.budget:
+        measured = measure_classify_us(paths)
+        with open(BUDGET_PATH, "w", encoding="utf-8") as f:
+            json.dump({"classify_us_per_frame": round(measured * BUDGET_HEADROOM, 1)}, f, indent=1)
+            f.write("\n")
+        print(f"已更新预算: 实测 {measured:.1f} us x {BUDGET_HEADROOM}")
+
+
+def cmd_show(args):
+    for path in iter_session_paths(args.sessions):
+        print(os.path.basename(path))
+        for event in replay_session(path)[0]:
+            print(f"  {event['t']:>8.3f}  #{event['hand']}  [{event['mode']}] {event['action']}")
+
+
+def cmd_fixtures(args):
+    for path in make_fixtures():
+        print(f"已生成: {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="手势回放回归测试：比对基准事件序列与分类耗时预算")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_check = sub.add_parser("check", help="回放并与基准比对，失败时退出码为 1")
+    p_check.add_argument("sessions", nargs="*", help="录制文件或目录，默认 golden/sessions")
+    p_check.set_defaults(func=cmd_check)
+
+    p_update = sub.add_parser("update", help="行为有意改变后重新生成基准")
+    p_update.add_argument("sessions", nargs="*", help="录制文件或目录，默认 golden/sessions")
+    p_update.add_argument("--budget", action="store_true", help="同时按本机实测值更新耗时预算")
+    p_update.set_defaults(func=cmd_update)
+
+    p_show = sub.add_parser("show", help="打印回放得到的事件序列")
+    p_show.add_argument("sessions", nargs="+")
+    p_show.set_defaults(func=cmd_show)
+
+    p_fixtures = sub.add_parser("make-fixtures", help="重新生成合成测试会话")
+    p_fixtures.set_defaults(func=cmd_fixtures)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+
+def _thread_names():
+    return {t.ident: t.name for t in threading.enumerate()}
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    """
+    低开销采样剖析：后台线程按固定间隔读取所有线程的调用栈 (sys._current_frames)，
+    按 线程 + 调用栈 计数，输出 collapsed stack (folded) 格式，可直接导入 speedscope 或 flamegraph.pl
+    """
+
+    def __init__(self, interval_ms=10):
+        self.interval = interval_ms / 1000
+        self.samples = collections.Counter()
+        self.sample_count = 0
+        self._thread = None
+        self._running = False
+        self._started_at = 0.0
+        self._elapsed = 0.0
+        self._cpu = 0.0
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self.samples.clear()
+        self.sample_count = 0
+        self._running = True
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._thread.join(timeout=1.0)
+        self._elapsed = time.perf_counter() - self._started_at
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        cpu_start = time.thread_time()
+        names = _thread_names()
+        while self._running:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                # 线程列表变化不频繁，遇到新线程时才刷新名字
+                if ident not in names:
+                    names = _thread_names()
+                    names.setdefault(ident, None)
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                # QThread 启动的线程不在 threading 的登记表里，用最外层函数命名 (如 HandTrackingThread.run)
+                name = names.get(ident) or getattr(stack[-1], "co_qualname", stack[-1].co_name)
+                self.samples[(name, tuple(reversed(stack)))] += 1
+            self.sample_count += 1
+            time.sleep(self.interval)
+        self._cpu = time.thread_time() - cpu_start
+
+    def write_collapsed(self, path):
+        """
+        每行: 线程;文件:函数;文件:函数 ... 次数
+        线程名作为根帧，在火焰图中即为按线程拆分
+        """
+        lines = collections.Counter()
+        for (name, stack), count in self.samples.items():
+            frames = [name.replace(";", ":").replace(" ", "_")]
+            frames.extend(_frame_label(code).replace(";", ":").replace(" ", "_") for code in stack)
+            lines[";".join(frames)] += count
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(lines.items()):
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top=5):
+        """
+        :return: 文本报告：各线程采样占比及自身耗时最多的函数，以及采样线程自身的 CPU 开销
+        """
+        per_thread = collections.Counter()
+        self_time = collections.defaultdict(collections.Counter)
+        for (name, stack), count in self.samples.items():
+            per_thread[name] += count
+            self_time[name][_frame_label(stack[-1])] += count
+
+        lines = [f"采样 {self.sample_count} 次，时长 {self._elapsed:.1f} s，间隔 {self.interval * 1000:.0f} ms，"
+                 f"采样开销 {self._cpu / max(self._elapsed, 1e-6) * 100:.2f}% CPU"]
+        for name, count in per_thread.most_common():
+            lines.append(f"[{name}] {count} 个样本，自身耗时最多的函数：")
+            for label, n in self_time[name].most_common(top):
+                lines.append(f"    {n / count:>6.1%}  {label}")
+        return "\n".join(lines)
+
+    def save(self, path=None):
+        """停止采样并写出结果，返回文件路径"""
+        self.stop()
+        if path is None:
+            path = time.strftime("profile-%Y%m%d-%H%M%S.folded")
+        self.write_collapsed(path)
+        return path
@@ -0,0 +1,65 @@
+import json
+import os
+import time
+
+STATE_VERSION = 1
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser("~"), ".gesture_player", "session.json")
+
+
+def folder_mtime_ns(folder):
+    """目录的修改时间；目录内增删文件都会改变它，None 表示目录不存在"""
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
+
+
+def make_state(folder, playlist, index, position, volume, rate, sidebar):
+    """
+    播放状态快照，播放列表只保存文件名 (都在 folder 下)
+    :param position: 当前播放位置 (毫秒)
+    """
+    return {
+        "version": STATE_VERSION,
+        "folder": folder,
+        "folder_mtime_ns": folder_mtime_ns(folder),
+        "files": [os.path.basename(p) for p in playlist],
+        "index": index,
+        "position": position,
+        "volume": volume,
+        "rate": rate,
+        "sidebar": sidebar,
+        "saved": time.time(),
+    }
+
+
+def save_state(path, state):
+    """先写临时文件再 os.replace，中途退出或断电不会留下写了一半的快照"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_state(path):
+    """
+    :return: 快照 dict；文件不存在、损坏、版本不符或目录已不存在时返回 None
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    if not state.get("folder") or not os.path.isdir(state["folder"]):
+        return None
+    return state
+
+
+def is_fresh(state):
+    """目录修改时间与保存时一致：播放列表可以直接使用，无需重新扫描"""
+    return state.get("folder_mtime_ns") is not None and state["folder_mtime_ns"] == folder_mtime_ns(state["folder"])
@@ -0,0 +1,102 @@
+import time
+
+# 尽早记录起点，之后的导入耗时都计入报告
+_T0 = time.perf_counter()
+
+import argparse
+import sys
+import threading
+
+# 这些模块出现在 sys.modules 中说明视觉栈被加载了
+VISION_MODULES = ("cv2", "mediapipe", "numpy")
+
+
+class StartupProfile:
+    """
+    启动耗时记录：mark(阶段) 表示该阶段开始，耗时为到下一个 mark 的时间 (线程安全)
+    """
+
+    def __init__(self, t0=None):
+        self.t0 = _T0 if t0 is None else t0
+        self._marks = []
+        self._lock = threading.Lock()
+
+    def mark(self, stage):
+        with self._lock:
+            self._marks.append((stage, time.perf_counter(), threading.current_thread().name))
+
+    def report(self):
+        with self._lock:
+            marks = list(self._marks)
+        print(f"{'阶段':<24}{'线程':<14}{'开始 ms':>10}{'耗时 ms':>10}")
+        for i, (stage, t, thread) in enumerate(marks):
+            start = (t - self.t0) * 1000
+            if i + 1 < len(marks):
+                print(f"{stage:<24}{thread:<14}{start:>10.1f}{(marks[i + 1][1] - t) * 1000:>10.1f}")
+            else:
+                print(f"{stage:<24}{thread:<14}{start:>10.1f}{'':>10}")
+        loaded = [name for name in VISION_MODULES if name in sys.modules]
+        print(f"已加载的视觉模块: {', '.join(loaded) if loaded else '无'}")
+
+
+def main():
+    """
+    启动性能剖析：按正常流程启动播放器，打印各阶段耗时后自动退出
+    用法: python startup.py [main.py 的参数，如 --no-gesture]
+    """
+    parser = argparse.ArgumentParser(description="打印播放器启动各阶段耗时")
+    parser.add_argument("--timeout", type=float, default=30.0, help="等待手势识别就绪的最长时间 (秒)")
+    args, rest = parser.parse_known_args()
+
+    profile = StartupProfile()
+    profile.mark("导入 PyQt5")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer, Qt
+    profile.mark("导入 main / ui")
+    import main as player_main
+
+    player_args = player_main.parse_args([sys.argv[0]] + rest)
+    profile.mark("创建 QApplication")
+    app = QApplication(sys.argv[:1])
+    profile.mark("创建播放器窗口")
+    player, server = player_main.create_player(player_args)
+    profile.mark("显示窗口")
+    player.show()
+
+    finished = []
+
+    def finish():
+        if finished:
+            return
+        finished.append(True)
+        profile.mark("完成")
+        profile.report()
+        app.quit()
+
+    def on_status(stage):
+        profile.mark(f"手势: {stage}")
+
+    def on_status_queued(stage):
+        if stage == "就绪":
+            finish()
+
+    def on_first_paint():
+        profile.mark("首次进入事件循环")
+        if not isinstance(player.hand_thread, player_main.HandTrackingThread):
+            finish()
+
+    if isinstance(player.hand_thread, player_main.HandTrackingThread):
+        # 直连：在工作线程里立即记录，不受主线程排队影响
+        player.hand_thread.status_changed.connect(on_status, Qt.DirectConnection)
+        player.hand_thread.status_changed.connect(on_status_queued)
+    QTimer.singleShot(0, on_first_paint)
+    QTimer.singleShot(int(args.timeout * 1000), finish)
+
+    app.exec_()
+    player.close()
+    if server:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
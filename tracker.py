@@ -0,0 +1,235 @@
+import numpy as np
+
+# 双手手势：两只手都伸出食指 (ONCE / CONTINUE 姿态) 时，按两食指指尖距离的变化判断缩放
+PINCH_MODES = ("ONCE", "CONTINUE")
+# 缩放时两食指相对，单手看起来就是指向左 / 右
+PINCH_ACTIONS = ("Left", "Right")
+
+
+class GestureTrigger:
+    """
+    单只手的触发状态 (状态改变立即触发，CONTINUE 保持时按间隔连续触发)
+    """
+
+    def __init__(self, continuous_interval=0.33):
+        self.continuous_interval = continuous_interval
+        self.last_mode = "NONE"
+        self.last_action = None
+        self.last_trigger_time = 0
+
+    def update(self, mode, action, now):
+        """
+        :return: 本帧是否应当发出指令
+        """
+        should_emit = False
+
+        if mode != "NONE" and action is not None:
+            # 1. 状态改变 -> 立即触发
+            if (mode != self.last_mode) or (action != self.last_action):
+                should_emit = True
+                self.last_trigger_time = now
+
+            # 2. 状态不变且为 CONTINUE 模式 -> 连续触发
+            elif mode == "CONTINUE":
+                if now - self.last_trigger_time > self.continuous_interval:
+                    should_emit = True
+                    self.last_trigger_time = now
+
+        self.last_mode = mode
+        self.last_action = action
+        return should_emit
+
+
+class TrackedHand:
+    def __init__(self, hand_id, handedness, centroid, now, continuous_interval):
+        self.id = hand_id
+        self.handedness = handedness
+        self.centroid = centroid
+        self.last_seen = now
+        self.lms = None
+        self.mode = "NONE"
+        self.action = None
+        self.confidence = 0.0
+        # 开始伸出食指 (PINCH_MODES) 的时间
+        self.pinch_since = None
+        self.trigger = GestureTrigger(continuous_interval)
+
+
+class HandTracker:
+    """
+    多手跟踪：按手性 + 最近质心把每帧的检测结果关联到稳定的手 ID，
+    每只手维护独立的触发状态，并识别双手缩放手势
+    """
+
+    def __init__(self, continuous_interval=0.33, max_distance=0.25, max_missing=1.0,
+                 zoom_in_ratio=1.25, zoom_out_ratio=0.8, zoom_grace=0.5):
+        """
+        :param zoom_grace: 画面中有其他手时，一只手开始伸出食指后的这段时间 (秒) 内，
+                           它指向左 / 右的指令先不发出，期间开始双手缩放则取消
+                           (两只手很少同时伸出食指，否则先伸出的手会先触发一次跳转)，0 表示不延迟
+        """
+        self.continuous_interval = continuous_interval
+        # 质心最大关联距离 (归一化坐标)
+        self.max_distance = max_distance
+        # 手消失超过该时长 (秒) 后丢弃其 ID
+        self.max_missing = max_missing
+        self.zoom_in_ratio = zoom_in_ratio
+        self.zoom_out_ratio = zoom_out_ratio
+
+        # 控制手锁定：开启后只有第一只触发指令的手可以控制，直到它离开画面
+        self.lock_enabled = False
+        self.lock_id = None
+
+        self.zoom_grace = zoom_grace
+
+        self.hands = {}
+        self._next_id = 1
+        self._zoom_base = None
+        # 暂缓发出的指令 [(到期时间, 事件), ...]，按触发顺序排列
+        self._pending = []
+
+    def set_continuous_interval(self, interval):
+        self.continuous_interval = interval
+        for hand in self.hands.values():
+            hand.trigger.continuous_interval = interval
+
+    def _associate(self, detections, now):
+        """
+        :param detections: [{"lms": [[x, y, z], ...], "handedness": str, ...}, ...]
+        :return: 与 detections 一一对应的 TrackedHand 列表
+        """
+        centroids = [np.asarray(d["lms"], dtype=np.float32)[:, :2].mean(axis=0) for d in detections]
+        tracks = list(self.hands.values())
+        assigned = [None] * len(detections)
+
+        if tracks and detections:
+            a = np.stack(centroids)
+            b = np.stack([t.centroid for t in tracks])
+            dist = np.linalg.norm(a[:, None, :] - b[None, :, :], axis=2)
+            # 手性不一致时不允许关联
+            for j, t in enumerate(tracks):
+                for i, d in enumerate(detections):
+                    if d.get("handedness") and t.handedness and d["handedness"] != t.handedness:
+                        dist[i, j] = np.inf
+            # 贪心：距离从小到大依次配对
+            used_tracks = set()
+            for flat in np.argsort(dist, axis=None):
+                i, j = divmod(int(flat), len(tracks))
+                if dist[i, j] > self.max_distance:
+                    break
+                if assigned[i] is None and j not in used_tracks:
+                    assigned[i] = tracks[j]
+                    used_tracks.add(j)
+
+        for i, d in enumerate(detections):
+            if assigned[i] is None:
+                hand = TrackedHand(self._next_id, d.get("handedness"), centroids[i], now,
+                                   self.continuous_interval)
+                self._next_id += 1
+                self.hands[hand.id] = hand
+                assigned[i] = hand
+            assigned[i].centroid = centroids[i]
+            assigned[i].last_seen = now
+            assigned[i].lms = d["lms"]
+        return assigned
+
+    def _update_zoom(self, visible):
+        pinching = [h for h in visible if h.mode in PINCH_MODES]
+        locked = self.lock_id if self.lock_enabled else None
+        # 锁定控制手后，只有控制手参与的双手缩放才有效，其他人不能借此抢走控制
+        if len(pinching) < 2 or (locked is not None and all(h.id != locked for h in pinching)):
+            self._zoom_base = None
+            return None
+
+        a, b = sorted(pinching, key=lambda h: (h.id != locked, h.id))[:2]
+        dist = float(np.linalg.norm(np.asarray(a.lms[8][:2]) - np.asarray(b.lms[8][:2])))
+        if self._zoom_base is None:
+            self._zoom_base = max(dist, 1e-6)
+            return None
+
+        ratio = dist / self._zoom_base
+        if ratio >= self.zoom_in_ratio:
+            self._zoom_base = dist
+            return "In"
+        if ratio <= self.zoom_out_ratio:
+            self._zoom_base = max(dist, 1e-6)
+            return "Out"
+        return None
+
+    def _hold_back(self, candidates, now):
+        """
+        画面中还有其他手 (或刚离开不久) 时，刚伸出食指指向左 / 右的指令可能是双手缩放的开头，
+        暂缓到 zoom_grace 到期后再发出，期间重复的指令 (CONTINUE) 只保留一条；
+        只有一只手时不延迟。同一只手随后触发其他指令时，先发出它暂缓的指令，保持顺序
+        :return: 本帧应发出的指令
+        """
+        released = [event for due, event in self._pending if due <= now]
+        self._pending = [(due, event) for due, event in self._pending if due > now]
+        for event in candidates:
+            hand = self.hands[event[3]]
+            if event[0] in PINCH_MODES and event[1] in PINCH_ACTIONS:
+                due = hand.pinch_since + self.zoom_grace
+                others = any(other.id != hand.id and now - other.last_seen <= self.zoom_grace
+                             for other in self.hands.values())
+                if now < due and others:
+                    if all(e[:2] != event[:2] or e[3] != hand.id for _, e in self._pending):
+                        self._pending.append((due, event))
+                    continue
+            released.extend(e for _, e in self._pending if e[3] == hand.id)
+            self._pending = [(due, e) for due, e in self._pending if e[3] != hand.id]
+            released.append(event)
+        return released
+
+    def update(self, detections, gestures, now):
+        """
+        :param detections: 本帧检测到的手 [{"lms", "handedness", "score"}, ...]
+        :param gestures: 与 detections 对应的分类结果 [(模式, 动作, 置信度), ...]
+        :param now: 当前时间 (秒)
+        :return: (visible, events)
+                 visible: 本帧可见的 TrackedHand 列表
+                 events: 需要执行的指令 [(模式, 动作, 置信度, 手 ID), ...]
+        """
+        visible = self._associate(detections, now)
+        visible_ids = {h.id for h in visible}
+
+        # 消失的手：状态复位，超时后丢弃
+        for hand_id, hand in list(self.hands.items()):
+            if hand_id in visible_ids:
+                continue
+            hand.mode, hand.action, hand.pinch_since = "NONE", None, None
+            hand.trigger.update("NONE", None, now)
+            if now - hand.last_seen > self.max_missing:
+                del self.hands[hand_id]
+        if self.lock_id is not None and self.lock_id not in self.hands:
+            self.lock_id = None
+
+        candidates = []
+        for hand, (mode, action, confidence) in zip(visible, gestures):
+            hand.mode, hand.action, hand.confidence = mode, action, confidence
+            if mode not in PINCH_MODES:
+                hand.pinch_since = None
+            elif hand.pinch_since is None:
+                hand.pinch_since = now
+            if hand.trigger.update(mode, action, now):
+                candidates.append((mode, action, confidence, hand.id))
+
+        # 双手缩放优先，期间单手指令不生效 (触发状态照常更新，松开后不会补发)
+        zoom = self._update_zoom(visible)
+        if self._zoom_base is not None:
+            self._pending.clear()
+            if zoom:
+                confidence = min(h.confidence for h in visible if h.mode in PINCH_MODES)
+                return visible, [("ZOOM", zoom, confidence, None)]
+            return visible, []
+
+        released = self._hold_back(candidates, now)
+        if not self.lock_enabled:
+            return visible, released
+
+        events = []
+        for event in released:
+            if self.lock_id is None:
+                self.lock_id = event[3]
+            if event[3] == self.lock_id:
+                events.append(event)
+        return visible, events
@@ -1,59 +1,121 @@
 import os
+from collections import OrderedDict
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QSlider, QLabel,
                              QFileDialog, QStyle, QListWidget, QListWidgetItem,
                              QMenu, QAction, QActionGroup, QFrame)
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
-from PyQt5.QtCore import Qt, QUrl, QTimer, pyqtSignal, QPoint, QSize
+from PyQt5.QtCore import (Qt, QUrl, QTimer, pyqtSignal, QPoint, QSize, QRectF, QVariantAnimation,
+                          QFileSystemWatcher, QEvent)
+from PyQt5.QtGui import QColor, QFont, QPainter, QPixmap
 
+import playlist as playlist_ops
+from session_state import DEFAULT_STATE_PATH, is_fresh, load_state, make_state, save_state
 
-# === 1. OSD 控件 (默认显示 1秒) ===
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv')
+
+
+# === 1. OSD 控件 (默认显示 0.6秒，之后淡出) ===
 class OSDWidget(QWidget):
+    """
+    图标 + 文字预先渲染成 QPixmap 并缓存 (LRU)，显示时只需贴图，
+    避免每次更新都触发样式表计算、文字排版和 emoji 字体回退
+    """
+    CACHE_SIZE = 64
+    FADE_MS = 200
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFixedSize(160, 100)
         self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_NoSystemBackground)
         self.hide()
 
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(5)
-
-        self.setStyleSheet("""
-            QWidget {
-                background-color: rgba(0, 0, 0, 180);
-                border-radius: 12px;
-            }
-            QLabel {
-                color: white;
-                background-color: transparent;
-                font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
-                font-weight: bold;
-            }
-        """)
-
-        self.icon_label = QLabel()
-        self.icon_label.setAlignment(Qt.AlignCenter)
-        self.icon_label.setStyleSheet("font-size: 40px;")
-        layout.addWidget(self.icon_label)
+        self.icon_font = QFont()
+        self.icon_font.setFamilies(["Microsoft YaHei", "Segoe UI", "sans-serif"])
+        self.icon_font.setPixelSize(40)
+        self.icon_font.setBold(True)
+        self.text_font = QFont(self.icon_font)
+        self.text_font.setPixelSize(20)
 
-        self.text_label = QLabel()
-        self.text_label.setAlignment(Qt.AlignCenter)
-        self.text_label.setStyleSheet("font-size: 20px;")
-        layout.addWidget(self.text_label)
+        self._cache = OrderedDict()
+        self._pixmap = None
+        self._key = None
+        self._opacity = 1.0
 
         self.hide_timer = QTimer(self)
         self.hide_timer.setSingleShot(True)
-        self.hide_timer.timeout.connect(self.hide)
+        self.hide_timer.timeout.connect(self.fade_out)
+
+        self.fade_animation = QVariantAnimation(self)
+        self.fade_animation.setDuration(self.FADE_MS)
+        self.fade_animation.setStartValue(1.0)
+        self.fade_animation.setEndValue(0.0)
+        self.fade_animation.valueChanged.connect(self.set_opacity)
+        self.fade_animation.finished.connect(self.hide)
+
+    def render_pixmap(self, icon_text, message):
+        """按原样式 (半透明圆角底 + 40px 图标 + 20px 文字) 绘制一张 OSD 图片"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(QSize(int(self.width() * ratio), int(self.height() * ratio)))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 180))
+        painter.drawRoundedRect(QRectF(0, 0, self.width(), self.height()), 12, 12)
+
+        painter.setPen(Qt.white)
+        # 上下两行，间距 5px，与原先的 QVBoxLayout 布局一致
+        row_h = (self.height() - 5) / 2
+        painter.setFont(self.icon_font)
+        painter.drawText(QRectF(0, 0, self.width(), row_h), Qt.AlignCenter, icon_text)
+        painter.setFont(self.text_font)
+        painter.drawText(QRectF(0, row_h + 5, self.width(), row_h), Qt.AlignCenter, message)
+        painter.end()
+        return pixmap
+
+    def get_pixmap(self, icon_text, message):
+        key = (icon_text, message, self.devicePixelRatioF())
+        pixmap = self._cache.get(key)
+        if pixmap is None:
+            pixmap = self.render_pixmap(icon_text, message)
+            self._cache[key] = pixmap
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return key, pixmap
 
     def show_message(self, icon_text, message, duration=600):
-        self.icon_label.setText(icon_text)
-        self.text_label.setText(message)
-        self.show()
-        self.raise_()
+        key, pixmap = self.get_pixmap(icon_text, message)
+        self.fade_animation.stop()
+        # 内容和透明度都没变时 (连续触发同一条提示) 只需续时，不必重绘
+        if key != self._key or self._opacity != 1.0 or not self.isVisible():
+            self._key, self._pixmap, self._opacity = key, pixmap, 1.0
+            self.update()
+        if not self.isVisible():
+            self.show()
+            self.raise_()
         self.hide_timer.start(duration)
 
+    def fade_out(self):
+        self.fade_animation.start()
+
+    def set_opacity(self, value):
+        self._opacity = value
+        self.update()
+
+    def paintEvent(self, event):
+        if self._pixmap is None:
+            return
+        painter = QPainter(self)
+        painter.setOpacity(self._opacity)
+        painter.drawPixmap(0, 0, self._pixmap)
+
 
 # === 2. 可点击进度条 ===
 class ClickableSlider(QSlider):
@@ -238,14 +300,47 @@ class VideoPlayer(QMainWindow):
 
         self.playlist = []
         self.current_index = -1
+        # 正在播放的文件已从目录删除时为其路径 (此时 current_index 为 -1)，上一部 / 下一部按它原来的位置计算
+        self.missing_path = None
         self.sidebar_is_visible = True
         self.sidebar_width = 260
         self.video_duration = 0
         self.last_volume = 50
 
+        # 采样剖析 (F9 开关)，结果保存到 profile_path，None 时按时间命名
+        self.profiler = None
+        self.profile_path = None
+
         self.player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
 
+        # 监听已打开的目录，变化合并 (去抖) 后增量更新播放列表
+        self.folder_path = None
+        self.folder_watcher = QFileSystemWatcher(self)
+        self.folder_change_timer = QTimer(self)
+        self.folder_change_timer.setSingleShot(True)
+        self.folder_change_timer.setInterval(500)
+        self.folder_change_timer.timeout.connect(self.apply_folder_changes)
+        self.folder_watcher.directoryChanged.connect(lambda path: self.folder_change_timer.start())
+
+        # 进度条和时间标签的刷新合并到屏幕刷新周期内，控件不可见时暂停
+        self.pending_position = 0
+        self.shown_seconds = {}
+        self.display_timer = QTimer(self)
+        self.display_timer.setSingleShot(True)
+        self.display_timer.timeout.connect(self.flush_display)
+
+        # 播放状态快照：退出时及播放中定期保存，启动时恢复；state_path 为 None 时关闭
+        self.state_path = DEFAULT_STATE_PATH
+        # 恢复时待跳转的 (文件路径, 位置)，只对该文件生效
+        self.pending_seek = None
+        # 上次写盘的快照 (不含保存时间)，内容没有变化时定时保存跳过写盘
+        self.last_saved_state = None
+        self.state_save_timer = QTimer(self)
+        self.state_save_timer.setInterval(5000)
+        self.state_save_timer.timeout.connect(self.autosave_session)
+
         self.init_ui_components()
+        self.controls_widget.installEventFilter(self)
 
         self.player.setVideoOutput(self.video_widget)
 
@@ -258,6 +353,9 @@ class VideoPlayer(QMainWindow):
         self.player.setVolume(100)
         self.btn_volume.set_value(100)
 
+        self.state_save_timer.start()
+        QTimer.singleShot(0, self.restore_session)
+
     def init_ui_components(self):
         self.central_widget = QWidget(self)
         self.setCentralWidget(self.central_widget)
@@ -550,9 +648,31 @@ class VideoPlayer(QMainWindow):
         elif event.key() == Qt.Key_BracketRight:
             self.play_next()
             self.video_widget.show_osd("⏭", "下一部")
+        elif event.key() == Qt.Key_F9:
+            self.toggle_profiler()
         else:
             super().keyPressEvent(event)
 
+    def toggle_profiler(self):
+        """开始 / 停止采样剖析，覆盖主线程、手势线程及其他工作线程"""
+        from sampler import SamplingProfiler
+
+        if self.profiler and self.profiler.running:
+            path = self.profiler.save(self.profile_path)
+            print(self.profiler.summary())
+            print(f"剖析结果已保存: {path}")
+            self.video_widget.show_osd("⏹", "剖析已保存")
+        else:
+            self.profiler = SamplingProfiler()
+            self.profiler.start()
+            self.video_widget.show_osd("⏺", "开始剖析")
+
+    def closeEvent(self, event):
+        if self.profiler and self.profiler.running:
+            self.toggle_profiler()
+        self.save_session()
+        super().closeEvent(event)
+
     def toggle_mute(self):
         current_vol = self.player.volume()
         if current_vol > 0:
@@ -614,38 +734,184 @@ class VideoPlayer(QMainWindow):
     def update_playback_speed(self):
         action = self.sender()
         if action:
-            speed = action.data()
-            self.player.setPlaybackRate(speed)
-            self.btn_speed.setText(f"{speed}x")
-            self.video_widget.show_osd("🚀", f"{speed}x")
+            self.set_playback_speed(action.data())
+            self.video_widget.show_osd("🚀", f"{action.data()}x")
+
+    def set_playback_speed(self, speed):
+        self.player.setPlaybackRate(speed)
+        self.btn_speed.setText(f"{speed}x")
+        for action in self.speed_action_group.actions():
+            if action.data() == speed:
+                action.setChecked(True)
+
+    def step_playback_speed(self, step):
+        """
+        按倍速菜单的档位加减速
+        :param step: +1 加速一档，-1 减速一档
+        :return: 调整后的倍速
+        """
+        speeds = sorted(action.data() for action in self.speed_action_group.actions())
+        current = self.player.playbackRate() or 1.0
+        # 找到最接近当前倍速的档位
+        index = min(range(len(speeds)), key=lambda i: abs(speeds[i] - current))
+        speed = speeds[max(0, min(index + step, len(speeds) - 1))]
+        self.set_playback_speed(speed)
+        return speed
 
     def open_folder(self):
         folder_path = QFileDialog.getExistingDirectory(self, "选择影视目录")
         if folder_path:
-            self.playlist.clear()
-            self.playlist_widget.clear()
-            video_extensions = ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv')
-
-            for file_name in os.listdir(folder_path):
-                if file_name.lower().endswith(video_extensions):
-                    full_path = os.path.join(folder_path, file_name)
-                    self.playlist.append(full_path)
-
-            if self.playlist:
-                self.playlist.sort()
-                self.playlist_widget.clear()
-                for file_path in self.playlist:
-                    self.playlist_widget.addItem(QListWidgetItem(os.path.basename(file_path)))
-
-                self.current_index = 0
-                self.load_video()
-                print(f"已加载 {len(self.playlist)} 个视频")
+            self.load_folder(folder_path)
+
+    def scan_folder(self, folder_path):
+        """返回目录下按路径排序的视频文件列表"""
+        return sorted(os.path.join(folder_path, file_name) for file_name in os.listdir(folder_path)
+                      if file_name.lower().endswith(VIDEO_EXTENSIONS))
+
+    def set_playlist(self, playlist):
+        self.playlist = playlist
+        self.missing_path = None
+        self.playlist_widget.clear()
+        for file_path in playlist:
+            self.playlist_widget.addItem(QListWidgetItem(os.path.basename(file_path)))
+
+    def load_folder(self, folder_path):
+        self.watch_folder(folder_path)
+        self.set_playlist(self.scan_folder(folder_path))
+        self.pending_seek = None
+
+        if self.playlist:
+            self.current_index = 0
+            self.load_video()
+            print(f"已加载 {len(self.playlist)} 个视频")
+        else:
+            self.current_index = -1
+            print("未找到视频文件")
+
+    # === 目录监听：新增 / 删除的文件增量更新到播放列表 ===
+    def watch_folder(self, folder_path):
+        watched = self.folder_watcher.directories()
+        if watched:
+            self.folder_watcher.removePaths(watched)
+        self.folder_path = folder_path
+        self.folder_watcher.addPath(folder_path)
+
+    def apply_folder_changes(self):
+        """
+        对比目录与当前播放列表，只对变化的文件做插入 / 删除 (见 playlist.apply_changes)，
+        正在播放的视频不受影响；当前文件被删除时继续播放已打开的内容，列表中不再选中任何条目
+        """
+        if not self.folder_path:
+            return
+        try:
+            files = self.scan_folder(self.folder_path)
+        except OSError as e:
+            print(f"目录读取失败: {e}")
+            return
+        ops, self.current_index, self.missing_path = playlist_ops.apply_changes(
+            self.playlist, files, self.current_index, self.missing_path)
+        if not ops:
+            return
+
+        for op in ops:
+            if op[0] == "remove":
+                self.playlist_widget.takeItem(op[1])
             else:
-                print("未找到视频文件")
+                self.playlist_widget.insertItem(op[1], QListWidgetItem(os.path.basename(op[2])))
+
+        self.update_playlist_selection()
+        added = sum(1 for op in ops if op[0] == "insert")
+        print(f"播放列表已更新: +{added} -{len(ops) - added}")
+
+    def resume_index(self):
+        """保存 / 恢复时的序号，见 playlist.resume_index"""
+        return playlist_ops.resume_index(self.playlist, self.current_index, self.missing_path)
+
+    # === 播放状态快照：启动时直接回到上次的画面 ===
+    def autosave_session(self):
+        """定时保存：只在播放中进行，暂停或空闲时状态不会变化，退出时 closeEvent 会再保存一次"""
+        if self.player.state() == QMediaPlayer.PlayingState:
+            self.save_session(only_if_changed=True)
+
+    def save_session(self, only_if_changed=False):
+        """
+        :param only_if_changed: 与上次写盘的快照相同时跳过
+        """
+        if not self.state_path or not self.folder_path:
+            return
+        index, position = self.current_index, self.player.position()
+        # 恢复后媒体还没加载完成时，播放器的位置还是 0，以待跳转的位置为准
+        if self.pending_seek is not None and 0 <= index < len(self.playlist) \
+                and self.pending_seek[0] == self.playlist[index]:
+            position = self.pending_seek[1]
+        if self.missing_path is not None:
+            # 当前文件已删除：下次从排在它后面的文件开头播放
+            index, position = self.resume_index(), 0
+        state = make_state(self.folder_path, self.playlist, index, position,
+                           self.player.volume(), self.player.playbackRate(), self.sidebar_is_visible)
+        compare = {key: value for key, value in state.items() if key != "saved"}
+        if only_if_changed and compare == self.last_saved_state:
+            return
+        try:
+            save_state(self.state_path, state)
+        except OSError as e:
+            print(f"播放状态保存失败: {e}")
+            return
+        self.last_saved_state = compare
+
+    def restore_session(self):
+        """
+        目录修改时间与快照一致时直接使用保存的播放列表，不扫描目录；
+        不一致时在保存的列表上做增量更新 (与目录监听相同)
+        """
+        if not self.state_path or self.folder_path:
+            return
+        state = load_state(self.state_path)
+        if state is None:
+            return
+
+        self.set_volume(state["volume"])
+        if state["rate"] != 1.0:
+            self.set_playback_speed(state["rate"])
+        if state["sidebar"] != self.sidebar_is_visible:
+            self.toggle_sidebar()
+
+        folder = state["folder"]
+        playlist = [os.path.join(folder, name) for name in state["files"]]
+        index = state["index"]
+        current = playlist[index] if 0 <= index < len(playlist) else None
+        self.watch_folder(folder)
+        self.set_playlist(playlist)
+        self.current_index = index
+
+        fresh = is_fresh(state)
+        if not fresh:
+            self.apply_folder_changes()
+        if not self.playlist:
+            self.current_index = -1
+            return
+
+        position = state["position"]
+        if self.missing_path is not None:
+            # 上次播放的文件已不存在：从排在它后面的文件开头播放
+            self.current_index = self.resume_index()
+            position = 0
+        elif current is None:
+            self.current_index = 0
+            position = 0
+        self.load_video()
+        self.player.pause()
+        # 媒体加载完成后才能跳转，见 media_status_changed
+        if position:
+            self.pending_seek = (self.playlist[self.current_index], position)
+        print(f"已恢复上次的播放状态 ({'目录未变化' if fresh else '目录有变化，已增量更新'})")
 
     def load_video(self):
+        # 切换文件后，上一个文件未完成的跳转不再有效
+        self.pending_seek = None
         if 0 <= self.current_index < len(self.playlist):
             file_path = self.playlist[self.current_index]
+            self.missing_path = None
             self.player.setMedia(QMediaContent(QUrl.fromLocalFile(file_path)))
             self.setWindowTitle(f"正在播放: {os.path.basename(file_path)}")
             self.btn_play.setEnabled(True)
@@ -688,23 +954,66 @@ class VideoPlayer(QMainWindow):
     def media_status_changed(self, status):
         if status == QMediaPlayer.EndOfMedia:
             self.play_next()
+        elif status in (QMediaPlayer.LoadedMedia, QMediaPlayer.BufferedMedia) and self.pending_seek is not None:
+            path, position = self.pending_seek
+            self.pending_seek = None
+            if self.player.currentMedia().canonicalUrl() == QUrl.fromLocalFile(path):
+                self.player.setPosition(position)
 
     def position_changed(self, position):
-        if not self.slider.isSliderDown():
-            self.slider.setValue(position)
-        self.label_current_time.setText(self.format_time(position))
+        self.schedule_display(position)
 
     def duration_changed(self, duration):
         self.video_duration = duration
         self.slider.setRange(0, duration)
-        self.label_total_time.setText(self.format_time(duration))
-
-        current_pos = self.player.position()
-        self.label_current_time.setText(self.format_time(current_pos))
+        # 时长决定是否显示小时位，两个标签都按新格式重写
+        self.shown_seconds.clear()
+        self.set_time_label(self.label_total_time, duration)
+        self.schedule_display(self.player.position())
 
     def set_position(self, position):
         self.player.setPosition(position)
-        self.label_current_time.setText(self.format_time(position))
+        self.schedule_display(position)
+
+    def controls_visible(self):
+        return self.controls_widget.isVisible() and not self.isMinimized()
+
+    def schedule_display(self, position):
+        """记录最新进度，每个屏幕刷新周期最多更新一次界面"""
+        self.pending_position = position
+        if self.display_timer.isActive() or not self.controls_visible():
+            return
+        window = self.windowHandle()
+        screen = window.screen() if window else QApplication.primaryScreen()
+        refresh = (screen.refreshRate() if screen else 0) or 60
+        self.display_timer.start(max(1, int(1000 / refresh)))
+
+    def flush_display(self):
+        if not self.controls_visible():
+            return
+        position = self.pending_position
+        if not self.slider.isSliderDown() and self.slider.value() != position:
+            self.slider.setValue(position)
+        self.set_time_label(self.label_current_time, position)
+
+    def set_time_label(self, label, ms):
+        """显示的秒数没变时跳过格式化和 setText"""
+        seconds = ms // 1000
+        if self.shown_seconds.get(label) == seconds:
+            return
+        self.shown_seconds[label] = seconds
+        label.setText(self.format_time(ms))
+
+    def eventFilter(self, obj, event):
+        # 控件重新显示时补上暂停期间的最新进度
+        if obj is self.controls_widget and event.type() == QEvent.Show:
+            self.schedule_display(self.pending_position)
+        return super().eventFilter(obj, event)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self.schedule_display(self.pending_position)
 
     def seek_relative(self, delta_ms):
         current_pos = self.player.position()
@@ -715,18 +1024,12 @@ class VideoPlayer(QMainWindow):
 
     def play_prev(self):
         if self.playlist:
-            if self.current_index == -1:
-                self.current_index = 0
-            else:
-                self.current_index = (self.current_index - 1 + len(self.playlist)) % len(self.playlist)
+            self.current_index = playlist_ops.step_index(self.playlist, self.current_index, self.missing_path, -1)
             self.load_video()
 
     def play_next(self):
         if self.playlist:
-            if self.current_index == -1:
-                self.current_index = 0
-            else:
-                self.current_index = (self.current_index + 1) % len(self.playlist)
+            self.current_index = playlist_ops.step_index(self.playlist, self.current_index, self.missing_path, 1)
             self.load_video()
 
     def set_volume(self, volume):